@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import UserProfile, ResetToken
+from .models import UserProfile, ResetToken, ApiToken
 
-admin.site.register(UserProfile)
-admin.site.register(ResetToken)
+# Load the user each row's __str__ shows in the change list query
+admin.site.register(UserProfile, list_select_related=["user"])
+admin.site.register(ResetToken, list_select_related=["user"])
+admin.site.register(ApiToken, list_select_related=["user"])
@@ -9,6 +9,7 @@ class AccountsConfig(AppConfig):
     def ready(self):
         """Assign permissions to groups after migrations."""
         from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401
         post_migrate.connect(setup_permissions, sender=self)
 
 
@@ -17,6 +18,7 @@ def setup_permissions(sender, **kwargs):
     from django.contrib.auth.models import Group, Permission
     from django.contrib.contenttypes.models import ContentType
     from accounts.models import UserProfile
+    from accounts.permissions import bump_permissions
 
     vendor, _ = Group.objects.get_or_create(name='vendor')
     buyer, _ = Group.objects.get_or_create(name='buyer')
@@ -46,3 +48,6 @@ def setup_permissions(sender, **kwargs):
 
     vendor.permissions.set([can_manage_store, can_manage_product])
     buyer.permissions.set([can_purchase, can_review])
+
+    # The grants may have changed, so drop every cached permission set
+    bump_permissions()
@@ -0,0 +1,63 @@
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    get_authorization_header,
+)
+from rest_framework.permissions import BasePermission
+
+from .permissions import resolve
+from .tokens import TokenInfo, get_token, usage
+
+KEYWORD = b"token"
+
+
+class TokenAuthentication(BaseAuthentication):
+    """
+    Authenticate API requests by an `Authorization: Token <key>` header.
+
+    Checking a key is one SHA-256 and, usually, an in-process cache
+    hit, where BasicAuthentication ran the password hasher on every
+    request. request.auth is the token's TokenInfo.
+    """
+
+    def authenticate(self, request):
+        """Return (user, token) for a valid key, or None without one."""
+        header = get_authorization_header(request).split()
+        if not header or header[0].lower() != KEYWORD:
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed(
+                "Invalid token header."
+            )
+
+        try:
+            key = header[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        token = get_token(key)
+        if token is None or not token.user.is_active:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+
+        usage.record(token.id)
+        resolve(token.user)
+        return token.user, token
+
+    def authenticate_header(self, request):
+        """Ask for a token in the WWW-Authenticate header of a 401."""
+        return "Token"
+
+
+def scope_required(scope):
+    """Return a permission class that needs a token with `scope`."""
+
+    class HasScope(BasePermission):
+        message = f"This token does not have the {scope} scope."
+
+        def has_permission(self, request, view):
+            return (
+                isinstance(request.auth, TokenInfo)
+                and scope in request.auth.scopes
+            )
+
+    return HasScope
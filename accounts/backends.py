@@ -0,0 +1,27 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .permissions import resolve
+
+
+class CachedPermissionBackend(ModelBackend):
+    """
+    ModelBackend that reads roles and permissions through the cache.
+
+    The stock backend queries the user's groups and permissions on the
+    first permission check of every request. This one loads them once
+    per user and permission version, see accounts/permissions.py, and
+    sets `role` (the profile's account type) on every user it loads.
+    """
+
+    def get_user(self, user_id):
+        """Return the session's user with its role and permissions set."""
+        user = super().get_user(user_id)
+        if user is not None:
+            resolve(user)
+        return user
+
+    def get_all_permissions(self, user_obj, obj=None):
+        """Return the user's permission names, from the cache if possible."""
+        if user_obj.is_active and not user_obj.is_anonymous and obj is None:
+            resolve(user_obj)
+        return super().get_all_permissions(user_obj, obj)
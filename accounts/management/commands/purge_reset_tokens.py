@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from accounts.reset_tokens import purge_expired
+
+
+class Command(BaseCommand):
+    """Delete password reset tokens that have expired."""
+
+    help = "Delete expired password reset tokens in batches."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of tokens to delete per query.",
+        )
+
+    def handle(self, *args, **options):
+        """Purge expired tokens."""
+        deleted = purge_expired(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired reset tokens")
+        )
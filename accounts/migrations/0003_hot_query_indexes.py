@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-17 06:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_alter_userprofile_options"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="resettoken",
+            index=models.Index(fields=["token"], name="reset_token_idx"),
+        ),
+    ]
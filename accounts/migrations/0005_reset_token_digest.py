@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+def delete_reset_tokens(apps, schema_editor):
+    """Drop outstanding tokens, whose SHA-1 digests can no longer match."""
+    ResetToken = apps.get_model("accounts", "ResetToken")
+    ResetToken.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_api_tokens"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_reset_tokens, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="resettoken",
+            name="reset_token_idx",
+        ),
+        migrations.RemoveField(
+            model_name="resettoken",
+            name="token",
+        ),
+        migrations.AddField(
+            model_name="resettoken",
+            name="digest",
+            field=models.CharField(default="", max_length=64, unique=True),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="resettoken",
+            index=models.Index(
+                fields=["expiry_date"], name="reset_token_expiry_idx"
+            ),
+        ),
+    ]
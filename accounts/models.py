@@ -35,10 +35,20 @@ class UserProfile(models.Model):
 class ResetToken(models.Model):
     """Store password reset tokens with expiry times."""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    token = models.CharField(max_length=500)
+    # SHA-256 hex digest of the token sent in the reset link
+    digest = models.CharField(max_length=64, unique=True)
     expiry_date = models.DateTimeField()
     used = models.BooleanField(default=False)
 
+    class Meta:
+        """Index expiry dates for purge_reset_tokens."""
+        indexes = [
+            models.Index(
+                fields=["expiry_date"],
+                name="reset_token_expiry_idx",
+            ),
+        ]
+
     def __str__(self):
         """Return a string representation of the ResetToken."""
         return f"Reset token for {self.user.username}"
@@ -48,3 +58,39 @@ class ResetToken(models.Model):
         from django.utils import timezone
 
         return timezone.now() > self.expiry_date
+
+
+class ApiToken(models.Model):
+    """Store a named, scoped API key; only a digest of the key is kept."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="api_tokens",
+    )
+    name = models.CharField(max_length=100)
+    # The first characters of the key, so the owner can tell keys apart
+    prefix = models.CharField(max_length=8)
+    digest = models.CharField(max_length=64, unique=True)
+    # Space separated, see accounts.tokens.SCOPES
+    scopes = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Written in batches by accounts.tokens, so up to a minute behind
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """List each user's tokens newest first."""
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"],
+                name="api_token_user_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the ApiToken."""
+        return f"{self.name} ({self.prefix}...) for {self.user.username}"
+
+    def scope_list(self):
+        """Return the token's scopes as a list."""
+        return self.scopes.split()
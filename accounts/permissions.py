@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from monitoring.metrics import count_lookup
+
+from .models import UserProfile
+
+VERSION_KEY = "permissions:version"
+
+
+def get_version():
+    """
+    Return the current global permission version.
+
+    Like the catalog versions in store/caching.py, a counter missing
+    from the cache restarts from the current time, so it never goes
+    back to a version that still has entries cached.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_permissions():
+    """Invalidate every user's cached role and permissions."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def entry_key(user_id, version):
+    """Return the cache key of one user's role and permissions."""
+    return f"permissions:{version}:{user_id}"
+
+
+def forget_user(user_id):
+    """Drop one user's cached role and permissions."""
+    cache.delete(entry_key(user_id, get_version()))
+
+
+def load_entry(user):
+    """Read a user's role and permission names from the database."""
+    role = (
+        UserProfile.objects.filter(user_id=user.id)
+        .values_list("account_type", flat=True)
+        .first()
+    )
+    permissions = ModelBackend().get_all_permissions(user)
+    return {"role": role, "permissions": frozenset(permissions)}
+
+
+def resolve(user):
+    """
+    Set `user.role` and the user's permission cache.
+
+    Both are read from the shared cache under the global permission
+    version, so on a warm cache this makes no database queries, and
+    has_perm() checks afterwards use the permissions set here.
+    """
+    if hasattr(user, "role") and hasattr(user, "_perm_cache"):
+        return
+
+    key = entry_key(user.id, get_version())
+    entry = cache.get(key)
+    count_lookup("permissions", entry is not None)
+    if entry is None:
+        entry = load_entry(user)
+        cache.set(key, entry, settings.PERMISSION_CACHE_TIMEOUT)
+
+    user.role = entry["role"]
+    user._perm_cache = set(entry["permissions"])
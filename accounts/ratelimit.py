@@ -0,0 +1,124 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import render
+
+
+def client_ip(request):
+    """Return the address the request came from."""
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def form_value(field):
+    """Return a function reading a form field, ignoring case and spaces."""
+    return lambda request: request.POST.get(field, "").strip().lower()
+
+
+# What a rate limit can count requests by
+KEYS = {
+    "ip": client_ip,
+    "username": form_value("username"),
+    "email": form_value("email"),
+}
+
+
+def hit(counter, limit, period):
+    """
+    Count one request and return the seconds to wait if over `limit`.
+
+    This is a sliding window counter: requests are counted per fixed
+    window of `period` seconds with an atomic cache increment, and the
+    previous window's count is weighted by how much of it still falls
+    inside the last `period` seconds. Returns 0 when under the limit.
+    """
+    now = time.time()
+    window = int(now // period)
+    elapsed = now - window * period
+    key = f"{counter}:{window}"
+
+    # Kept for two periods, as the next window still reads it
+    cache.add(key, 0, period * 2)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, period * 2)
+        count = 1
+    previous = cache.get(f"{counter}:{window - 1}", 0)
+
+    weight = (period - elapsed) / period
+    if previous * weight + count <= limit:
+        return 0
+
+    # Wait until one more request fits: within this window once enough
+    # of the previous one has slid out, otherwise part way into the next
+    if count < limit and previous:
+        wait = period * (1 - (limit - count - 1) / previous) - elapsed
+    else:
+        wait = period - elapsed + period * max(0, 1 - (limit - 1) / count)
+    return max(1, math.ceil(wait))
+
+
+def check(request, name):
+    """
+    Count a request against every rule of the named policy.
+
+    Returns the seconds until the request would be allowed, or 0 if it
+    is allowed now. Rules whose key is empty (a missing form field)
+    are skipped.
+    """
+    retry_after = 0
+    for key, limit, period in settings.RATE_LIMITS[name]:
+        value = KEYS[key](request)
+        if not value:
+            continue
+        digest = hashlib.sha256(value.encode()).hexdigest()[:32]
+        counter = f"ratelimit:{name}:{key}:{digest}"
+        retry_after = max(retry_after, hit(counter, limit, period))
+    return retry_after
+
+
+def limited_response(request, retry_after, api):
+    """Return the 429 response for a request over its rate limit."""
+    if api:
+        response = JsonResponse(
+            {"error": "Too many requests, please try again later."},
+            status=429,
+        )
+    else:
+        response = render(
+            request,
+            "429.html",
+            {"retry_after": retry_after},
+            status=429,
+        )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def ratelimit(name, methods=("GET", "POST"), api=False):
+    """
+    Reject requests over the named policy in settings.RATE_LIMITS.
+
+    Only requests using one of `methods` are counted. Over-limit
+    requests get a 429 with a Retry-After header before the view runs,
+    so they cost no password hashing, email or database work. Pass
+    api=True for a JSON error body.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if settings.RATE_LIMIT_ENABLED and request.method in methods:
+                retry_after = check(request, name)
+                if retry_after:
+                    return limited_response(request, retry_after, api)
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
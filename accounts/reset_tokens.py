@@ -0,0 +1,65 @@
+import secrets
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ResetToken
+from .tokens import digest_key
+
+# Minutes a password reset link stays valid
+RESET_TOKEN_MINUTES = 5
+
+
+def issue_reset_token(user):
+    """
+    Create a reset token for `user` and return the raw token.
+
+    Any token the user already had stops working, in one UPDATE, so
+    each user has at most one active token. Locking the user's row
+    keeps that true when two requests for the same user race.
+    Call inside a transaction.
+    """
+    User.objects.select_for_update().filter(pk=user.pk).exists()
+    ResetToken.objects.filter(user=user, used=False).update(used=True)
+
+    raw_token = secrets.token_urlsafe(32)
+    ResetToken.objects.create(
+        user=user,
+        digest=digest_key(raw_token),
+        expiry_date=timezone.now() + timedelta(minutes=RESET_TOKEN_MINUTES),
+    )
+    return raw_token
+
+
+def find_reset_token(raw_token):
+    """Return the active ResetToken for a raw token, or None."""
+    return (
+        ResetToken.objects.select_related("user")
+        .filter(digest=digest_key(raw_token), used=False)
+        .first()
+    )
+
+
+def purge_expired(batch_size=1000):
+    """
+    Delete expired reset tokens and return the count.
+
+    Rows are deleted in batches of primary keys, found through the
+    expiry index, so each DELETE holds its locks only briefly.
+    """
+    cutoff = timezone.now()
+    total = 0
+
+    while True:
+        ids = list(
+            ResetToken.objects.filter(expiry_date__lt=cutoff)
+            .order_by("expiry_date")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        with transaction.atomic():
+            ResetToken.objects.filter(id__in=ids).delete()
+        total += len(ids)
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ApiToken, UserProfile
+from .permissions import bump_permissions, forget_user
+from .tokens import forget_tokens
+
+
+@receiver([post_save, post_delete], sender=ApiToken)
+def token_changed(sender, instance, **kwargs):
+    """Drop a revoked, edited or deleted token from the caches."""
+    forget_tokens([instance.digest])
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    """Drop the caches that hold the user or their permissions."""
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    forget_tokens(
+        instance.api_tokens.values_list("digest", flat=True)
+    )
+    transaction.on_commit(lambda: forget_user(instance.id))
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def profile_changed(sender, instance, **kwargs):
+    """Drop the cached role of the profile's user."""
+    transaction.on_commit(lambda: forget_user(instance.user_id))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def permissions_changed(sender, instance, action, reverse, **kwargs):
+    """Invalidate cached permissions when memberships or grants change."""
+    if not action.startswith("post_"):
+        return
+    if isinstance(instance, User):
+        # Only this user's permissions changed
+        transaction.on_commit(lambda: forget_user(instance.id))
+    else:
+        transaction.on_commit(bump_permissions)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def permission_deleted(sender, instance, **kwargs):
+    """Invalidate cached permissions when a group or permission goes."""
+    transaction.on_commit(bump_permissions)
@@ -1,3 +1,195 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ApiToken, ResetToken, UserProfile
+from .ratelimit import hit
+from .reset_tokens import find_reset_token, issue_reset_token
+from .tokens import (
+    cache_key,
+    create_token,
+    digest_key,
+    get_token,
+    local_tokens,
+)
+
+
+def make_user(username, account_type):
+    """Create a user with the profile and group of `account_type`."""
+    user = User.objects.create_user(
+        username, f"{username}@example.com", "pass12345"
+    )
+    UserProfile.objects.create(user=user, account_type=account_type)
+    user.groups.add(Group.objects.get(name=account_type))
+    return user
+
+
+class AccountsTestCase(TestCase):
+    """Start each test with empty caches and a vendor."""
+
+    def setUp(self):
+        # Tokens and roles are cached by keys the test database reuses
+        cache.clear()
+        local_tokens.clear()
+        self.vendor = make_user("vendor", "vendor")
+
+
+class ApiTokenTests(AccountsTestCase):
+    """Tokens are stored hashed, cached safely and limited by scope."""
+
+    def create_store(self, key):
+        """Create a store through the API with `key`."""
+        return self.client.post(
+            reverse("api_create_store"),
+            {"name": "Shop", "description": "A shop"},
+            HTTP_AUTHORIZATION=f"Token {key}",
+        )
+
+    def test_only_digest_is_stored(self):
+        token, key = create_token(self.vendor, "api", ["stores:write"])
+
+        stored = ApiToken.objects.get(id=token.id)
+        self.assertEqual(stored.digest, digest_key(key))
+        self.assertEqual(stored.prefix, key[:8])
+        self.assertNotIn(key, [stored.digest, stored.name, stored.scopes])
+
+    def test_lookup(self):
+        token, key = create_token(self.vendor, "api", ["stores:write"])
+
+        info = get_token(key)
+
+        self.assertEqual(info.id, token.id)
+        self.assertEqual(info.user, self.vendor)
+        self.assertEqual(info.scopes, {"stores:write"})
+        self.assertIsNone(get_token(key + "x"))
+
+    def test_cached_user_has_no_password(self):
+        _, key = create_token(self.vendor, "api", ["stores:write"])
+        get_token(key)
+
+        for info in (
+            cache.get(cache_key(digest_key(key))),
+            local_tokens.get(digest_key(key)),
+        ):
+            self.assertEqual(info.user.id, self.vendor.id)
+            self.assertNotIn("password", info.user.__dict__)
+
+    def test_revoking_clears_cache(self):
+        token, key = create_token(self.vendor, "api", ["stores:write"])
+        self.assertIsNotNone(get_token(key))
+        self.client.force_login(self.vendor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("revoke_api_token", args=[token.id]))
+
+        self.assertIsNone(get_token(key))
+        self.assertEqual(self.create_store(key).status_code, 401)
+
+    def test_scope_is_enforced(self):
+        _, reader = create_token(self.vendor, "reader", ["reviews:read"])
+        _, writer = create_token(self.vendor, "writer", ["stores:write"])
+
+        self.assertEqual(self.create_store(reader).status_code, 403)
+        self.assertEqual(self.create_store(writer).status_code, 201)
+
+    def test_key_is_shown_once(self):
+        self.client.force_login(self.vendor)
+
+        response = self.client.post(
+            reverse("api_tokens"), {"name": "api", "scopes": "stores:write"}
+        )
+
+        token = ApiToken.objects.get(user=self.vendor)
+        key = response.context["key"]
+        self.assertEqual(token.digest, digest_key(key))
+        self.assertContains(response, key)
+        self.assertIn("no-store", response["Cache-Control"])
+        self.assertNotContains(self.client.get(reverse("api_tokens")), key)
+
+
+@override_settings(
+    RATE_LIMITS={
+        "login": [("ip", 100, 60), ("username", 2, 60)],
+        "api": [("ip", 1, 60)],
+    }
+)
+class RateLimitTests(AccountsTestCase):
+    """Requests over a limit get a 429 with a Retry-After header."""
+
+    def test_login_over_limit(self):
+        for _ in range(2):
+            response = self.client.post(
+                reverse("login"), {"username": "vendor", "password": "x"}
+            )
+            self.assertEqual(response.status_code, 200)
+
+        response = self.client.post(
+            reverse("login"), {"username": "Vendor ", "password": "x"}
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(1 <= int(response["Retry-After"]) <= 120)
+
+    def test_api_over_limit(self):
+        self.client.get(reverse("api_search"), {"q": "shop"})
+
+        response = self.client.get(reverse("api_search"), {"q": "shop"})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        self.assertIn("error", response.json())
+
+    @mock.patch("accounts.ratelimit.time.time")
+    def test_window_slides(self, now):
+        # Two requests at the end of one window still count just after
+        # the next one starts, unlike with a fixed window
+        now.return_value = 60 * 1000 + 59
+        self.assertEqual(hit("test", 2, 60), 0)
+        self.assertEqual(hit("test", 2, 60), 0)
+
+        now.return_value = 60 * 1001 + 1
+        self.assertGreater(hit("test", 2, 60), 0)
+
+        now.return_value = 60 * 1003
+        self.assertEqual(hit("test", 2, 60), 0)
+
+
+class ResetTokenTests(AccountsTestCase):
+    """Only the newest reset link works, and expired ones are purged."""
+
+    def test_new_token_replaces_old_one(self):
+        old = issue_reset_token(self.vendor)
+        new = issue_reset_token(self.vendor)
+
+        self.assertIsNone(find_reset_token(old))
+        self.assertEqual(find_reset_token(new).user, self.vendor)
+
+        response = self.client.post(
+            reverse("reset_password", args=[old]),
+            {"password": "newpass123", "confirm_password": "newpass123"},
+        )
+        self.assertRedirects(response, reverse("login"))
+        self.vendor.refresh_from_db()
+        self.assertFalse(self.vendor.check_password("newpass123"))
+
+    def test_purge_command(self):
+        expired = issue_reset_token(self.vendor)
+        ResetToken.objects.update(
+            expiry_date=timezone.now() - timedelta(minutes=1)
+        )
+        buyer = make_user("buyer", "buyer")
+        active = issue_reset_token(buyer)
+        out = StringIO()
+
+        call_command("purge_reset_tokens", "--batch-size=1", stdout=out)
+
+        self.assertIn("Deleted 1 expired reset tokens", out.getvalue())
+        self.assertIsNone(find_reset_token(expired))
+        self.assertIsNotNone(find_reset_token(active))
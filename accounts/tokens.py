@@ -0,0 +1,230 @@
+import copy
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from monitoring.metrics import count_lookup
+
+from .models import ApiToken
+
+# Scope name -> (description, permission the user needs to grant it)
+SCOPES = {
+    "stores:write": ("Create stores", "accounts.can_manage_store"),
+    "products:write": (
+        "Add and import products",
+        "accounts.can_manage_product",
+    ),
+    "reviews:read": ("Read product reviews", None),
+}
+
+# What a token lookup resolves to; `user` must be copied before use, and
+# is loaded without its password hash, which is never cached
+TokenInfo = namedtuple("TokenInfo", ["id", "user", "scopes"])
+
+# Cached in place of a TokenInfo for keys that match no active token
+UNKNOWN = "unknown"
+
+
+def digest_key(key):
+    """
+    Return the stored digest of an API key.
+
+    Keys are 256 random bits, so a single SHA-256 is as safe to store
+    as a slow password hash and costs microseconds to check.
+    """
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def cache_key(digest):
+    """Return the shared cache key for a token digest."""
+    return f"api_token:{digest}"
+
+
+def grantable_scopes(user):
+    """Return the scopes `user` is allowed to put on a token."""
+    return [
+        scope
+        for scope, (_, permission) in SCOPES.items()
+        if permission is None or user.has_perm(permission)
+    ]
+
+
+def create_token(user, name, scopes):
+    """
+    Create a token for `user` and return (token, key).
+
+    The key is only available here; afterwards just its digest is
+    stored, so it must be shown to the user straight away.
+    """
+    key = secrets.token_urlsafe(32)
+    token = ApiToken.objects.create(
+        user=user,
+        name=name,
+        prefix=key[:8],
+        digest=digest_key(key),
+        scopes=" ".join(sorted(scopes)),
+    )
+    return token, key
+
+
+def revoke_token(token):
+    """Revoke a token; it stops working as soon as caches are cleared."""
+    token.revoked_at = timezone.now()
+    token.save(update_fields=["revoked_at"])
+
+
+class LocalCache:
+    """
+    A small thread-safe LRU cache whose entries expire after `ttl`.
+
+    It sits in front of the shared cache so that most requests resolve
+    their token without any network round trip. Other processes cannot
+    clear it, so `ttl` bounds how long a revoked token keeps working in
+    a process that had it cached.
+    """
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None when missing or expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Cache a value, evicting the least recently used entries."""
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        """Forget a cached value."""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        """Forget every cached value."""
+        with self.lock:
+            self.entries.clear()
+
+
+local_tokens = LocalCache(
+    settings.API_TOKEN_LOCAL_CACHE_SIZE,
+    settings.API_TOKEN_LOCAL_CACHE_TTL,
+)
+
+
+def load_token(digest):
+    """Read the active token with `digest` from the database."""
+    token = (
+        ApiToken.objects.select_related("user")
+        .defer("user__password")
+        .filter(digest=digest, revoked_at__isnull=True)
+        .first()
+    )
+    if token is None:
+        return UNKNOWN
+    return TokenInfo(token.id, token.user, frozenset(token.scope_list()))
+
+
+def get_token(key):
+    """
+    Return the TokenInfo for an API key, or None if it is not valid.
+
+    Lookups go through the process's LocalCache, then the shared
+    cache, then the database. Unknown keys are cached too, so guessing
+    keys does not reach the database either.
+    """
+    digest = digest_key(key)
+    info = local_tokens.get(digest)
+    count_lookup("api_tokens_local", info is not None)
+
+    if info is None:
+        info = cache.get(cache_key(digest))
+        count_lookup("api_tokens", info is not None)
+        if info is None:
+            info = load_token(digest)
+            cache.set(
+                cache_key(digest),
+                info,
+                settings.API_TOKEN_CACHE_TIMEOUT,
+            )
+        local_tokens.set(digest, info)
+
+    if info == UNKNOWN:
+        return None
+    # Each request gets its own user, as views may cache things on it
+    return info._replace(user=copy.copy(info.user))
+
+
+def forget_tokens(digests):
+    """Drop tokens from the caches once the transaction commits."""
+    digests = list(digests)
+
+    def forget():
+        cache.delete_many([cache_key(digest) for digest in digests])
+        for digest in digests:
+            local_tokens.delete(digest)
+
+    transaction.on_commit(forget)
+
+
+class UsageRecorder:
+    """
+    Collect when tokens were last used and save them in batches.
+
+    Every authenticated request notes its token here; at most once per
+    `interval` seconds the latest time of each token used since is
+    written in a single UPDATE, instead of one write per request.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.pending = {}
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, token_id):
+        """Note that a token was used now, saving the batch when due."""
+        with self.lock:
+            self.pending[token_id] = timezone.now()
+            if time.monotonic() - self.flushed_at < self.interval:
+                return
+        self.flush()
+
+    def flush(self):
+        """Save the pending last-used times."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushed_at = time.monotonic()
+        if pending:
+            ApiToken.objects.bulk_update(
+                [
+                    ApiToken(id=token_id, last_used_at=used_at)
+                    for token_id, used_at in pending.items()
+                ],
+                ["last_used_at"],
+            )
+
+
+usage = UsageRecorder(settings.API_TOKEN_LAST_USED_INTERVAL)
@@ -15,4 +15,10 @@ urlpatterns = [
         views.reset_password,
         name="reset_password",
     ),
+    path("api-tokens/", views.api_tokens, name="api_tokens"),
+    path(
+        "api-tokens/<int:token_id>/revoke/",
+        views.revoke_api_token,
+        name="revoke_api_token",
+    ),
 ]
@@ -1,17 +1,20 @@
-from datetime import timedelta
-
-import hashlib
-import secrets
-
 from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User, Group
 from django.contrib import messages
-from django.core.mail import EmailMessage
-from django.conf import settings
-from django.shortcuts import render, redirect
-from django.utils import timezone
+from django.db import transaction
+from django.shortcuts import render, redirect, get_object_or_404
+from django.views.decorators.cache import never_cache
 
-from .models import UserProfile, ResetToken
+from outbox.mail import queue_email
+from .models import UserProfile, ApiToken
+from .ratelimit import ratelimit
+from .reset_tokens import (
+    RESET_TOKEN_MINUTES,
+    find_reset_token,
+    issue_reset_token,
+)
+from .tokens import SCOPES, create_token, grantable_scopes, revoke_token
 
 
 def register_user(request):
@@ -62,6 +65,7 @@ def register_user(request):
     return render(request, "accounts/register.html")
 
 
+@ratelimit("login", methods=("POST",))
 def login_user(request):
     """Handle user login and session creation."""
     if request.method == "POST":
@@ -86,6 +90,7 @@ def logout_user(request):
     return redirect("login")
 
 
+@ratelimit("forgot_password", methods=("POST",))
 def forgot_password(request):
     """Handle forgotten password requests by sending a reset email."""
     if request.method == "POST":
@@ -94,33 +99,23 @@ def forgot_password(request):
         try:
             user = User.objects.get(email=email)
 
-            raw_token = secrets.token_urlsafe(32)
-            hashed_token = hashlib.sha1(
-                raw_token.encode()
-            ).hexdigest()
-
-            ResetToken.objects.create(
-                user=user,
-                token=hashed_token,
-                expiry_date=timezone.now() + timedelta(minutes=5),
-            )
-
-            reset_url = (
-                f"http://localhost:8000/accounts/"
-                f"reset-password/{raw_token}/"
-            )
-
-            email_message = EmailMessage(
-                subject="Password Reset Request",
-                body=(
-                    f"Click the link below to reset your password.\n\n"
-                    f"{reset_url}\n\n"
-                    f"This link expires in 5 minutes."
-                ),
-                from_email=settings.EMAIL_HOST_USER,
-                to=[user.email],
-            )
-            email_message.send()
+            with transaction.atomic():
+                raw_token = issue_reset_token(user)
+                reset_url = (
+                    f"http://localhost:8000/accounts/"
+                    f"reset-password/{raw_token}/"
+                )
+
+                queue_email(
+                    subject="Password Reset Request",
+                    body=(
+                        f"Click the link below to reset your password.\n\n"
+                        f"{reset_url}\n\n"
+                        f"This link expires in {RESET_TOKEN_MINUTES} "
+                        f"minutes."
+                    ),
+                    to=[user.email],
+                )
 
         except User.DoesNotExist:
             pass
@@ -137,14 +132,8 @@ def forgot_password(request):
 
 def reset_password(request, token):
     """Validate a reset token and allow the user to set a new password."""
-    hashed_token = hashlib.sha1(token.encode()).hexdigest()
-
-    try:
-        reset_token = ResetToken.objects.get(
-            token=hashed_token,
-            used=False,
-        )
-    except ResetToken.DoesNotExist:
+    reset_token = find_reset_token(token)
+    if reset_token is None:
         messages.error(request, "Invalid or expired link")
         return redirect("login")
 
@@ -191,3 +180,57 @@ def reset_password(request, token):
         "accounts/reset_password.html",
         {"token": token},
     )
+
+
+@login_required
+@never_cache
+def api_tokens(request):
+    """
+    List the user's API tokens and create new ones.
+
+    A new token's key is rendered once, in the response to the POST
+    that created it, and never stored in the session or a message.
+    """
+    allowed = grantable_scopes(request.user)
+    created = key = None
+
+    if request.method == "POST":
+        name = request.POST.get("name", "").strip()[:100]
+        scopes = request.POST.getlist("scopes")
+
+        if not name:
+            messages.error(request, "Give the token a name")
+        elif not scopes or not set(scopes) <= set(allowed):
+            messages.error(request, "Choose at least one allowed scope")
+        else:
+            created, key = create_token(request.user, name, scopes)
+
+    return render(
+        request,
+        "accounts/api_tokens.html",
+        {
+            "tokens": ApiToken.objects.filter(user=request.user).order_by(
+                "-created_at"
+            ),
+            "scopes": [(scope, SCOPES[scope][0]) for scope in allowed],
+            "created": created,
+            "key": key,
+        },
+    )
+
+
+@login_required
+def revoke_api_token(request, token_id):
+    """Revoke one of the user's API tokens."""
+    token = get_object_or_404(
+        ApiToken,
+        id=token_id,
+        user=request.user,
+        revoked_at__isnull=True,
+    )
+
+    if request.method == "POST":
+        revoke_token(token)
+        messages.success(request, f"Token \"{token.name}\" revoked")
+
+    return redirect("api_tokens")
@@ -42,10 +42,14 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "accounts.apps.AccountsConfig",
     "store",
+    "outbox",
+    "monitoring",
     "rest_framework",
 ]
 
 MIDDLEWARE = [
+    "monitoring.middleware.PerformanceMiddleware",
+    "monitoring.middleware.NPlusOneMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -59,7 +63,10 @@ ROOT_URLCONF = "ecommerce_project.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "monitoring.backends.TimedDjangoTemplates",
+        # Keep the engine's usual alias, as it would otherwise be named
+        # after the backend's module
+        "NAME": "django",
         "DIRS": [BASE_DIR / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -90,6 +97,110 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Seconds a cached catalog page or API response may be served for.
+# Entries are invalidated immediately by version bumps, see store/caching.py
+CATALOG_CACHE_TIMEOUT = 300
+
+
+# Keyset pagination for list pages and the JSON API (?page_size=)
+PAGINATION_PAGE_SIZE = 20
+PAGINATION_MAX_PAGE_SIZE = 100
+
+
+# Product search (store/search.py). Corpus statistics are cached for
+# SEARCH_STATS_TIMEOUT seconds; terms found in more than
+# SEARCH_MAX_DF_RATIO of all products are skipped when a rarer term is
+# present, and results stop after SEARCH_MAX_PAGE pages. Only the
+# SEARCH_TERM_DEPTH highest-impact products of each term are ranked.
+SEARCH_STATS_TIMEOUT = 60
+SEARCH_MAX_DF_RATIO = 0.2
+SEARCH_MAX_PAGE = 50
+SEARCH_TERM_DEPTH = 1000
+
+
+# Lower bounds of the price ranges counted on the product list (the last
+# range is open-ended)
+PRICE_FACETS = [0, 50, 100, 250, 500, 1000]
+
+
+# Bulk product imports: rows validated and written per chunk, and the most
+# row errors reported back
+IMPORT_CHUNK_SIZE = 500
+IMPORT_MAX_ERRORS = 1000
+
+# Rows fetched per query by the streaming catalogue export
+EXPORT_CHUNK_SIZE = 1000
+
+
+# API tokens (accounts/tokens.py). Lookups are cached in each process for
+# API_TOKEN_LOCAL_CACHE_TTL seconds, which is how long a revoked token can
+# keep working there, and in the shared cache for API_TOKEN_CACHE_TIMEOUT
+# seconds. Last-used times are saved at most every
+# API_TOKEN_LAST_USED_INTERVAL seconds per process.
+API_TOKEN_LOCAL_CACHE_SIZE = 1024
+API_TOKEN_LOCAL_CACHE_TTL = 10
+API_TOKEN_CACHE_TIMEOUT = 300
+API_TOKEN_LAST_USED_INTERVAL = 60
+
+
+# Users are loaded with their role and permissions read through the cache
+# (accounts/permissions.py); entries are invalidated on change, so the
+# timeout only bounds how long unused entries are kept
+AUTHENTICATION_BACKENDS = ["accounts.backends.CachedPermissionBackend"]
+PERMISSION_CACHE_TIMEOUT = 3600
+
+
+# Rate limits (accounts/ratelimit.py): for each policy, a list of
+# (what to count by, requests allowed, per how many seconds). Counters live
+# in the default cache, which must be shared for limits across processes.
+RATE_LIMIT_ENABLED = True
+RATE_LIMITS = {
+    "login": [("ip", 20, 60), ("username", 5, 60)],
+    "forgot_password": [("ip", 5, 3600), ("email", 3, 3600)],
+    "api": [("ip", 120, 60)],
+}
+
+
+# Request timing (monitoring/middleware.py): the share of requests timed,
+# from 0 (off) to 1, and whether timed responses get a Server-Timing header
+# with their database, template and total milliseconds. The header shows
+# clients how the server works, so by default it is only sent in DEBUG.
+PERFORMANCE_SAMPLE_RATE = float(os.getenv("PERFORMANCE_SAMPLE_RATE", "0.05"))
+PERFORMANCE_SERVER_TIMING = os.getenv(
+    "PERFORMANCE_SERVER_TIMING", str(DEBUG)
+) == "True"
+
+# Prometheus metrics at /metrics (monitoring/). Scrapers must send
+# METRICS_TOKEN as a bearer token when it is set. Gauges counted in the
+# database are cached for METRICS_DB_TIMEOUT seconds; products with at most
+# LOW_STOCK_THRESHOLD units left outside carts count as low on stock.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_DB_TIMEOUT = 60
+LOW_STOCK_THRESHOLD = 5
+
+# N+1 query detection (monitoring/nplusone.py): when on, a query shape run
+# more than NPLUSONE_THRESHOLD times in one request from the same line of
+# code or template is logged ("log") or raises NPlusOneError ("raise"). The
+# test runner turns it on in "raise" mode.
+NPLUSONE_DETECTION = DEBUG
+NPLUSONE_THRESHOLD = 5
+NPLUSONE_ACTION = "log"
+TEST_RUNNER = "monitoring.testing.NPlusOneTestRunner"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -128,13 +239,37 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
 # Email settings
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND",
+    "django.core.mail.backends.smtp.EmailBackend",
+)
+EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", BASE_DIR / "sent_emails")
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER", "")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD", "")
 
+# Outbox delivery (see `python manage.py send_outbox`)
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_MAX_RETRY_DELAY = 3600
+# Seconds a worker has to send a claimed batch before other workers may
+# claim the same messages again; keep it well above a batch's send time
+OUTBOX_LEASE_SECONDS = 600
+
+# Minutes that items added to a cart stay reserved for the buyer
+STOCK_HOLD_MINUTES = 15
+
+# Carts live in the database and the session only keeps their id. The
+# session cookie lasts SESSION_COOKIE_AGE (two weeks by default), so carts
+# untouched for longer are unreachable and `purge_carts` deletes them.
+CART_TTL_DAYS = 14
+
+# Hours during which a repeated idempotency key replays the first response
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+
 # Login/Logout redirects
 LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/"
@@ -0,0 +1,40 @@
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .timing import current
+
+
+class TimedTemplate(Template):
+    """A Django template that adds its render time to the request timer."""
+
+    def render(self, context=None, request=None):
+        """Render, timing only the outermost template of the request."""
+        timer = current.get()
+        if timer is None or timer.rendering:
+            return super().render(context, request)
+
+        timer.rendering = True
+        started = time.perf_counter()
+        db = timer.db
+        try:
+            return super().render(context, request)
+        finally:
+            # Queries run by the template count as database time only
+            elapsed = time.perf_counter() - started
+            timer.template += elapsed - (timer.db - db)
+            timer.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render times recorded."""
+
+    def from_string(self, template_code):
+        """Compile a template from a string."""
+        template = super().from_string(template_code)
+        return TimedTemplate(template.template, self)
+
+    def get_template(self, template_name):
+        """Load a template by name."""
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from prometheus_client.core import GaugeMetricFamily
+
+from outbox.models import OutboxMessage
+from store.models import Product
+
+CACHE_KEY = "metrics:database_gauges"
+
+
+class DatabaseCollector:
+    """
+    Gauges read from the database when metrics are scraped.
+
+    The values are kept in the shared cache for METRICS_DB_TIMEOUT
+    seconds, so however many processes are scraped, the counts run at
+    most once per timeout.
+    """
+
+    def values(self):
+        """Return the gauge values, from the cache when fresh."""
+        values = cache.get(CACHE_KEY)
+        if values is None:
+            # Stock held in carts cannot be sold, so count what is left;
+            # comparing with reserved, rather than subtracting it, keeps
+            # unsigned columns from going negative
+            threshold = settings.LOW_STOCK_THRESHOLD
+            values = Product.objects.aggregate(
+                out_of_stock=Count("id", filter=Q(stock__lte=F("reserved"))),
+                low_stock=Count(
+                    "id",
+                    filter=Q(
+                        stock__gt=F("reserved"),
+                        stock__lte=F("reserved") + threshold,
+                    ),
+                ),
+            )
+            values.update(
+                outbox_pending=OutboxMessage.objects.filter(
+                    status=OutboxMessage.STATUS_PENDING
+                ).count(),
+                outbox_dead=OutboxMessage.objects.filter(
+                    status=OutboxMessage.STATUS_DEAD
+                ).count(),
+            )
+            cache.set(CACHE_KEY, values, settings.METRICS_DB_TIMEOUT)
+        return values
+
+    def collect(self):
+        """Yield the gauges."""
+        values = self.values()
+        yield GaugeMetricFamily(
+            "products_out_of_stock",
+            "Products with no stock left outside carts.",
+            value=values["out_of_stock"],
+        )
+        yield GaugeMetricFamily(
+            "products_low_stock",
+            "Products with LOW_STOCK_THRESHOLD or fewer units left "
+            "outside carts.",
+            value=values["low_stock"],
+        )
+        yield GaugeMetricFamily(
+            "outbox_pending_emails",
+            "Emails waiting in the outbox.",
+            value=values["outbox_pending"],
+        )
+        yield GaugeMetricFamily(
+            "outbox_dead_emails",
+            "Emails the outbox gave up on.",
+            value=values["outbox_dead"],
+        )
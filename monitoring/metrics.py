@@ -0,0 +1,138 @@
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# With PROMETHEUS_MULTIPROC_DIR set (before this module is imported),
+# every process writes its samples to files in that directory and a
+# scrape of any process adds them all up
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Upper bounds of the histogram buckets; +Inf is added automatically
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle a request, by URL name.",
+    ["view"],
+    buckets=SECONDS_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time a sampled request spent in database queries, by URL name.",
+    ["view"],
+    buckets=SECONDS_BUCKETS,
+)
+REQUEST_TEMPLATE_SECONDS = Histogram(
+    "http_request_template_seconds",
+    "Time a sampled request spent rendering templates, by URL name.",
+    ["view"],
+    buckets=SECONDS_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries run by a sampled request, by URL name.",
+    ["view"],
+    buckets=QUERY_BUCKETS,
+)
+RESPONSES = Counter(
+    "http_responses",
+    "Responses sent, by URL name and status code.",
+    ["view", "status"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "Cache reads, by cache and whether they hit.",
+    ["cache", "result"],
+)
+CHECKOUT_ORDERS = Counter(
+    "checkout_orders",
+    "Orders placed at checkout.",
+)
+CHECKOUT_EMPTY = Counter(
+    "checkout_rejected",
+    "Checkouts that placed no order as nothing was in stock.",
+)
+CHECKOUT_ADJUSTED = Counter(
+    "checkout_adjusted_lines",
+    "Cart lines cut down to the stock available at checkout.",
+)
+CHECKOUT_OUT_OF_STOCK = Counter(
+    "checkout_out_of_stock_lines",
+    "Cart lines dropped at checkout as out of stock.",
+)
+EMAILS_SENT = Counter(
+    "outbox_emails_sent",
+    "Outbox emails delivered.",
+)
+EMAIL_FAILURES = Counter(
+    "outbox_email_failures",
+    "Failed attempts to deliver an outbox email.",
+)
+EMAILS_DEAD = Counter(
+    "outbox_emails_dead",
+    "Outbox emails given up on after too many failures.",
+)
+
+
+def observe_request(view, seconds, status):
+    """Record the time and status code of any finished request."""
+    REQUEST_SECONDS.labels(view).observe(seconds)
+    RESPONSES.labels(view, str(status)).inc()
+
+
+def observe_timings(view, timer):
+    """Record the breakdown of a sampled request's RequestTimer."""
+    REQUEST_DB_SECONDS.labels(view).observe(timer.db)
+    REQUEST_TEMPLATE_SECONDS.labels(view).observe(timer.template)
+    REQUEST_QUERIES.labels(view).observe(timer.queries)
+
+
+def count_lookup(cache, hit):
+    """Count one read of the named cache."""
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_checkout(result):
+    """Count the outcome of a checkout from its CheckoutResult."""
+    if result.order is not None:
+        CHECKOUT_ORDERS.inc()
+    else:
+        CHECKOUT_EMPTY.inc()
+    if result.adjusted:
+        CHECKOUT_ADJUSTED.inc(len(result.adjusted))
+    if result.out_of_stock:
+        CHECKOUT_OUT_OF_STOCK.inc(len(result.out_of_stock))
+
+
+def exposition(*extra):
+    """
+    Return every metric in the Prometheus text format.
+
+    In multi-process mode the samples of all processes are read from
+    PROMETHEUS_MULTIPROC_DIR; otherwise this process's registry is
+    used, which also has the process and garbage collector metrics.
+    Collectors in `extra` are added to either.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    output = generate_latest(registry)
+
+    if extra:
+        registry = CollectorRegistry(auto_describe=False)
+        for collector in extra:
+            registry.register(collector)
+        output += generate_latest(registry)
+    return output
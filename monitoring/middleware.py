@@ -0,0 +1,80 @@
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import observe_request, observe_timings
+from .nplusone import detect
+from .timing import RequestTimer, current
+
+
+class PerformanceMiddleware:
+    """
+    Count and time every request, and profile a sample of them.
+
+    Every request's total time and status go to the Prometheus metrics
+    under the resolved URL name. A share of requests
+    (PERFORMANCE_SAMPLE_RATE) also run with a RequestTimer counting
+    database queries and their time and template render time; those
+    timings are added to the sampled Prometheus histograms, and the
+    response gets a Server-Timing header if PERFORMANCE_SERVER_TIMING
+    is on. Queries run while a streaming response is read are not
+    included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        rate = settings.PERFORMANCE_SAMPLE_RATE
+        timer = None
+        if rate > 0 and (rate >= 1 or random.random() < rate):
+            timer, response = self.profile(request)
+        else:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = request.resolver_match
+        name = match.view_name if match else "<unresolved>"
+        observe_request(name, elapsed, response.status_code)
+
+        if timer is not None:
+            observe_timings(name, timer)
+            if settings.PERFORMANCE_SERVER_TIMING:
+                response["Server-Timing"] = timer.server_timing()
+        return response
+
+    def profile(self, request):
+        """Handle the request under a RequestTimer; return both."""
+        timer = RequestTimer()
+        token = current.set(timer)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        timer.stop()
+        return timer, response
+
+
+class NPlusOneMiddleware:
+    """
+    Look for N+1 queries in each request when NPLUSONE_DETECTION is on.
+
+    See monitoring/nplusone.py; the test runner turns detection on, and
+    makes repeated queries raise.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.NPLUSONE_DETECTION:
+            return self.get_response(request)
+        with detect():
+            return self.get_response(request)
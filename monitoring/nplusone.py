@@ -0,0 +1,162 @@
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+# The QueryTracker watching the current request or block, if any
+current = ContextVar("query_tracker", default=None)
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+# IN lists and multi-row VALUES vary in length with the data
+IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+VALUES = re.compile(r"\((?:\?, )*\?\)(?:, \((?:\?, )*\?\))+")
+WHITESPACE = re.compile(r"\s+")
+
+# The instrumentation wrapping every query, which is no query's call site
+INSTRUMENTATION = tuple(
+    str(Path(__file__).resolve().parent / name)
+    for name in ["nplusone.py", "timing.py", "middleware.py", "backends.py"]
+)
+
+
+class NPlusOneError(Exception):
+    """A query ran more times than NPLUSONE_THRESHOLD from one place."""
+
+
+def normalise(sql):
+    """Return the shape of a SQL statement, with all values blanked."""
+    sql = WHITESPACE.sub(" ", sql).strip()
+    sql = STRING.sub("?", sql)
+    sql = NUMBER.sub("?", sql).replace("%s", "?")
+    sql = IN_LIST.sub("IN (...)", sql)
+    return VALUES.sub("(...)", sql)
+
+
+def is_project_file(filename):
+    """Return whether a source file is this project's own Python code."""
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and not filename.startswith(INSTRUMENTATION)
+        and "site-packages" not in filename
+    )
+
+
+def call_stack():
+    """
+    Return where the running query comes from, innermost first.
+
+    Entries are "path:line in function" for frames of the project's
+    Python code and "template name:line" for the template node being
+    rendered, one per template. Django and library frames are left
+    out.
+    """
+    entries = []
+    template = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if code is Node.render_annotated.__code__:
+            node = frame.f_locals["self"]
+            name = node.origin.template_name or node.origin.name
+            if name != template:
+                template = name
+                entries.append(f"template {name}:{node.token.lineno}")
+        elif is_project_file(code.co_filename):
+            path = Path(code.co_filename).relative_to(settings.BASE_DIR)
+            entries.append(f"{path}:{frame.f_lineno} in {code.co_name}")
+        frame = frame.f_back
+    return entries
+
+
+class QueryTracker:
+    """
+    Count queries by shape and call site, flagging repeated ones.
+
+    Installed as a database execute wrapper. When one normalised
+    statement runs more than `threshold` times from the same place, the
+    innermost project frame or template line, it is reported once: with
+    action "raise" as an NPlusOneError from the query that crossed the
+    threshold, otherwise as a logged warning.
+    """
+
+    def __init__(self, threshold, action):
+        self.threshold = threshold
+        self.action = action
+        self.counts = Counter()
+        self.reported = set()
+        self.paused = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.paused:
+            self.check(sql)
+        return execute(sql, params, many, context)
+
+    def check(self, sql):
+        """Count a statement and report it if it crossed the threshold."""
+        stack = call_stack()
+        if not stack:
+            return
+        key = (normalise(sql), stack[0])
+        self.counts[key] += 1
+        if self.counts[key] <= self.threshold or key in self.reported:
+            return
+
+        self.reported.add(key)
+        message = "\n".join(
+            [
+                f"Possible N+1 query: run {self.counts[key]} times "
+                f"from {stack[0]}",
+                f"    {key[0]}",
+                "Stack (most recent call last):",
+                *[f"    {entry}" for entry in reversed(stack)],
+            ]
+        )
+        if self.action == "raise":
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+@contextmanager
+def detect(threshold=None, action=None):
+    """
+    Watch the queries run inside the block for N+1 patterns.
+
+    The threshold and action default to NPLUSONE_THRESHOLD and
+    NPLUSONE_ACTION.
+    """
+    tracker = QueryTracker(
+        threshold or settings.NPLUSONE_THRESHOLD,
+        action or settings.NPLUSONE_ACTION,
+    )
+    token = current.set(tracker)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tracker))
+            yield tracker
+    finally:
+        current.reset(token)
+
+
+@contextmanager
+def allow_repeats():
+    """Ignore the queries run inside the block, for deliberate loops."""
+    tracker = current.get()
+    if tracker is None:
+        yield
+        return
+    tracker.paused += 1
+    try:
+        yield
+    finally:
+        tracker.paused -= 1
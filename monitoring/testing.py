@@ -0,0 +1,20 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class NPlusOneTestRunner(DiscoverRunner):
+    """Run the tests with N+1 queries in requests raising NPlusOneError."""
+
+    def setup_test_environment(self, **kwargs):
+        """Turn detection on, failing on the first repeated query."""
+        super().setup_test_environment(**kwargs)
+        self.nplusone_settings = override_settings(
+            NPLUSONE_DETECTION=True,
+            NPLUSONE_ACTION="raise",
+        )
+        self.nplusone_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        """Restore the detection settings."""
+        self.nplusone_settings.disable()
+        super().teardown_test_environment(**kwargs)
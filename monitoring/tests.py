@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from store.models import Store, Product, Review
+from .collectors import DatabaseCollector
+from .nplusone import NPlusOneError, allow_repeats, detect, normalise
+
+
+class NPlusOneTests(TestCase):
+    """The detector flags a foreign key read lazily inside a loop."""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner")
+        store = Store.objects.create(owner=owner, name="Shop")
+        product = Product.objects.create(
+            store=store, name="Lamp", price="5.00", stock=1
+        )
+        for i in range(10):
+            Review.objects.create(
+                product=product,
+                reviewer=User.objects.create_user(f"reviewer{i}"),
+                rating=5,
+            )
+
+    def test_lazy_foreign_key_in_loop_raises(self):
+        with self.assertRaisesMessage(NPlusOneError, "run 6 times from"):
+            with detect(threshold=5, action="raise"):
+                for review in Review.objects.all():
+                    review.reviewer.username
+
+    def test_select_related_passes(self):
+        with detect(threshold=5, action="raise"):
+            for review in Review.objects.select_related("reviewer"):
+                review.reviewer.username
+
+    def test_allow_repeats(self):
+        with detect(threshold=5, action="raise"):
+            with allow_repeats():
+                for review in Review.objects.all():
+                    review.reviewer.username
+
+    def test_log_action(self):
+        with self.assertLogs("monitoring.nplusone", "WARNING") as logs:
+            with detect(threshold=5, action="log"):
+                for review in Review.objects.all():
+                    review.reviewer.username
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("monitoring/tests.py", logs.output[0])
+
+    def test_normalise(self):
+        self.assertEqual(
+            normalise("SELECT a FROM t WHERE id IN (%s, %s) AND b = 'x'"),
+            "SELECT a FROM t WHERE id IN (...) AND b = ?",
+        )
+
+
+@override_settings(LOW_STOCK_THRESHOLD=5)
+class DatabaseCollectorTests(TestCase):
+    """Stock gauges count units that are not held in carts."""
+
+    def setUp(self):
+        cache.clear()
+        store = Store.objects.create(
+            owner=User.objects.create_user("owner"), name="Shop"
+        )
+        for stock, reserved in [(10, 10), (0, 0), (10, 5), (10, 4), (3, 0)]:
+            Product.objects.create(
+                store=store, name="Lamp", price="5.00", stock=stock,
+                reserved=reserved,
+            )
+
+    def test_stock_gauges(self):
+        values = DatabaseCollector().values()
+
+        self.assertEqual(values["out_of_stock"], 2)
+        self.assertEqual(values["low_stock"], 2)
@@ -0,0 +1,44 @@
+import time
+from contextvars import ContextVar
+
+# The RequestTimer of the request being handled, if it is sampled
+current = ContextVar("request_timer", default=None)
+
+
+class RequestTimer:
+    """
+    Time spent by one request in the database, templates and overall.
+
+    It is installed as a database execute wrapper, so it sees every
+    query the request runs on any connection.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def stop(self):
+        """Record the total time since the timer was created."""
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Return the Server-Timing header value, in milliseconds."""
+        app = max(0.0, self.total - self.db - self.template)
+        return (
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries", '
+            f"tpl;dur={self.template * 1000:.1f}, "
+            f"app;dur={app * 1000:.1f}, "
+            f"total;dur={self.total * 1000:.1f}"
+        )
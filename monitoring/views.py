@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from .collectors import DatabaseCollector
+from .metrics import exposition
+
+
+@require_GET
+def metrics(request):
+    """
+    Serve the metrics of every worker in the Prometheus text format.
+
+    When METRICS_TOKEN is set, scrapers must send it as a bearer token.
+    """
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        response = HttpResponse("Unauthorized", status=401)
+        response["WWW-Authenticate"] = "Bearer"
+        return response
+
+    return HttpResponse(
+        exposition(DatabaseCollector()),
+        content_type=CONTENT_TYPE_LATEST,
+    )
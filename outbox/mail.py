@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from monitoring.metrics import EMAIL_FAILURES, EMAILS_DEAD, EMAILS_SENT
+
+from .models import OutboxMessage
+
+
+def queue_email(subject, body, to, from_email=None):
+    """
+    Add an email to the outbox instead of sending it during the request.
+
+    The row is written on the caller's connection, so when called inside
+    a transaction the email is only queued if that transaction commits.
+    """
+    return OutboxMessage.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        to=list(to),
+    )
+
+
+def retry_delay(attempts):
+    """Return how long to wait before the next attempt (exponential)."""
+    delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.OUTBOX_MAX_RETRY_DELAY))
+
+
+def claim_batch(batch_size):
+    """
+    Lease up to `batch_size` due messages to this worker.
+
+    Due rows are locked with SKIP LOCKED, so concurrent workers claim
+    different messages, and their next attempt is pushed
+    OUTBOX_LEASE_SECONDS ahead. The transaction ends straight away: the
+    lease, not a lock, keeps other workers off the messages while they
+    are sent, and if this worker dies they become due again when it
+    runs out.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(
+                status=OutboxMessage.STATUS_PENDING,
+                next_attempt_at__lte=now,
+            )
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if batch:
+            OutboxMessage.objects.filter(
+                id__in=[message.id for message in batch]
+            ).update(
+                next_attempt_at=now
+                + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+            )
+
+    return batch
+
+
+def deliver_batch(batch_size=None):
+    """
+    Send one batch of due outbox messages over a single connection.
+
+    The messages are claimed in a short transaction and sent outside
+    of any, so a slow SMTP server holds no locks; the outcome of every
+    message is then saved with one bulk update. Returns a (sent,
+    failed) tuple.
+    """
+    batch = claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE)
+    sent = failed = 0
+
+    if not batch:
+        return sent, failed
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as exc:
+        for message in batch:
+            record_failure(message, exc)
+        OutboxMessage.objects.bulk_update(
+            batch,
+            ["status", "attempts", "next_attempt_at", "last_error"],
+        )
+        return sent, len(batch)
+
+    try:
+        for message in batch:
+            email = EmailMessage(
+                subject=message.subject,
+                body=message.body,
+                from_email=message.from_email,
+                to=message.to,
+                connection=connection,
+            )
+            try:
+                email.send()
+            except Exception as exc:
+                record_failure(message, exc)
+                failed += 1
+            else:
+                message.status = OutboxMessage.STATUS_SENT
+                message.attempts += 1
+                message.sent_at = timezone.now()
+                message.last_error = ""
+                EMAILS_SENT.inc()
+                sent += 1
+    finally:
+        connection.close()
+
+    OutboxMessage.objects.bulk_update(
+        batch,
+        [
+            "status",
+            "attempts",
+            "next_attempt_at",
+            "last_error",
+            "sent_at",
+        ],
+    )
+    return sent, failed
+
+
+def record_failure(message, exc):
+    """Schedule a retry for a failed message, or dead-letter it."""
+    message.attempts += 1
+    message.last_error = f"{type(exc).__name__}: {exc}"
+    EMAIL_FAILURES.inc()
+
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboxMessage.STATUS_DEAD
+        EMAILS_DEAD.inc()
+    else:
+        message.next_attempt_at = timezone.now() + retry_delay(
+            message.attempts
+        )
@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from outbox.mail import deliver_batch
+
+
+class Command(BaseCommand):
+    """Deliver queued outbox emails in batches."""
+
+    help = "Send pending outbox emails in batches over one connection."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.OUTBOX_BATCH_SIZE,
+            help="Number of messages to send per connection.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new messages instead of exiting.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to sleep between polls when the outbox is empty.",
+        )
+
+    def handle(self, *args, **options):
+        """Drain the outbox, optionally forever."""
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = deliver_batch(options["batch_size"])
+            total_sent += sent
+            total_failed += failed
+
+            if sent or failed:
+                self.stdout.write(f"Sent {sent}, failed {failed}")
+                continue
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Outbox drained: {total_sent} sent, {total_failed} failed"
+            )
+        )
@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxMessage(models.Model):
+    """Store an email waiting to be delivered by the send_outbox command."""
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_DEAD = "dead"
+    STATUSES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_DEAD, "Dead"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=STATUS_PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """Index the columns the delivery worker polls on."""
+        indexes = [
+            models.Index(
+                fields=["status", "next_attempt_at"],
+                name="outbox_status_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the OutboxMessage."""
+        return f"{self.subject} ({self.status})"
@@ -1,8 +1,47 @@
 from django.contrib import admin
-from .models import Store, Product, Order, OrderItem, Review
+from .models import (
+    Store,
+    Product,
+    Order,
+    OrderItem,
+    Review,
+    Cart,
+    CartItem,
+    StockHold,
+    IdempotencyKey,
+    SearchDocument,
+    SearchPosting,
+)
 
+# The change lists load what each row's __str__ reads in the same query,
+# and order lines pick their order and product by id instead of listing
+# every order in a select box
 admin.site.register(Store)
-admin.site.register(Product)
-admin.site.register(Order)
-admin.site.register(OrderItem)
-admin.site.register(Review)
+
+
+class ProductAdmin(admin.ModelAdmin):
+    """Edit products without touching their stock and rating counters."""
+    readonly_fields = Product.COUNTER_FIELDS
+
+    def save_model(self, request, obj, form, change):
+        """Save only the form's columns of an existing product."""
+        if change:
+            obj.save(update_fields=[*form.fields, "updated_at"])
+        else:
+            obj.save()
+
+
+admin.site.register(Product, ProductAdmin)
+admin.site.register(Order, list_select_related=["buyer"])
+admin.site.register(
+    OrderItem,
+    list_select_related=["product"],
+    raw_id_fields=["order", "product"],
+)
+admin.site.register(Review, list_select_related=["reviewer", "product"])
+admin.site.register(Cart, list_select_related=["user"])
+admin.site.register(CartItem, list_select_related=["product"])
+admin.site.register(StockHold, list_select_related=["product"])
+admin.site.register(IdempotencyKey, list_select_related=["user"])
+admin.site.register(SearchDocument, list_select_related=["product"])
+admin.site.register(SearchPosting)
@@ -0,0 +1,123 @@
+import math
+from collections import defaultdict
+
+from accounts.urls import urlpatterns as accounts_urls
+from store.urls import urlpatterns as store_urls
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of sorted `values`."""
+    if not values:
+        return None
+    rank = max(1, math.ceil(fraction * len(values)))
+    return values[rank - 1]
+
+
+def summarise(samples, elapsed):
+    """
+    Return per-view and overall statistics for a list of Samples.
+
+    Latencies are in milliseconds. A request counts as an error when it
+    got no response or a 5xx status.
+    """
+    by_name = defaultdict(list)
+    for sample in samples:
+        by_name[sample.name].append(sample)
+
+    views = {name: stats(group, elapsed) for name, group in by_name.items()}
+    return {
+        "views": dict(sorted(views.items())),
+        "total": stats(samples, elapsed),
+    }
+
+
+def stats(samples, elapsed):
+    """Return the statistics for one group of samples."""
+    latencies = sorted(sample.seconds * 1000 for sample in samples)
+    queries = [
+        sample.queries for sample in samples if sample.queries is not None
+    ]
+    statuses = defaultdict(int)
+    for sample in samples:
+        statuses[str(sample.status)] += 1
+
+    return {
+        "requests": len(samples),
+        "errors": sum(
+            1 for sample in samples
+            if sample.status == 0 or sample.status >= 500
+        ),
+        "throughput": round(len(samples) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 2)
+        if latencies else None,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "mean_queries": round(sum(queries) / len(queries), 2)
+        if queries else None,
+        "max_queries": max(queries) if queries else None,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+def compare(result, baseline, threshold):
+    """
+    Return the regressions of `result` against a `baseline` result.
+
+    A view regresses when its p95 latency grew by more than
+    `threshold` (0.1 for 10%), or when it runs more queries on average.
+    Each regression is (view, metric, baseline value, new value).
+    """
+    regressions = []
+    for name, new in result["views"].items():
+        old = baseline.get("views", {}).get(name)
+        if old is None:
+            continue
+        if old["p95_ms"] and new["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            regressions.append((name, "p95_ms", old["p95_ms"], new["p95_ms"]))
+        if (
+            old.get("mean_queries") is not None
+            and new["mean_queries"] is not None
+            and new["mean_queries"] > old["mean_queries"] + 0.5
+        ):
+            regressions.append(
+                (name, "mean_queries", old["mean_queries"],
+                 new["mean_queries"])
+            )
+    return regressions
+
+
+def format_table(summary):
+    """Return the summary as lines of a fixed-width table."""
+    header = (
+        f"{'view':<28} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50':>8} "
+        f"{'p95':>8} {'p99':>8} {'queries':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    rows = list(summary["views"].items()) + [("TOTAL", summary["total"])]
+    for name, view in rows:
+        queries = view["mean_queries"]
+        lines.append(
+            f"{name:<28} {view['requests']:>6} {view['errors']:>4} "
+            f"{view['throughput'] or 0:>8.1f} {view['p50_ms']:>8.1f} "
+            f"{view['p95_ms']:>8.1f} {view['p99_ms']:>8.1f} "
+            f"{'-' if queries is None else f'{queries:.1f}':>7}"
+        )
+    return lines
+
+
+def route_names():
+    """Return the names of every route in the store and accounts apps."""
+    return sorted(
+        {
+            pattern.name
+            for pattern in [*store_urls, *accounts_urls]
+            if pattern.name
+        }
+    )
+
+
+def uncovered(summary):
+    """Return the named routes the run never requested."""
+    return [name for name in route_names() if name not in summary["views"]]
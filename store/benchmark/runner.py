@@ -0,0 +1,88 @@
+import random
+import threading
+import time
+import traceback
+
+from django.db import connections
+
+from .scenarios import SCENARIOS
+
+
+def parse_mix(text):
+    """
+    Parse a scenario mix like "anonymous=50,buyer=25" into weights.
+
+    Raises ValueError for unknown scenarios or bad weights.
+    """
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(
+                f"Unknown scenario {name!r}; choose from "
+                f"{', '.join(SCENARIOS)}"
+            )
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise ValueError(f"Bad weight for {name}: {weight!r}")
+        if mix[name] < 0:
+            raise ValueError(f"Bad weight for {name}: {weight!r}")
+    if not any(mix.values()):
+        raise ValueError("The mix needs at least one positive weight")
+    return mix
+
+
+def run(session_factory, fixtures, mix, threads=4, duration=None,
+        iterations=None, seed=0):
+    """
+    Run scenarios from `mix` on `threads` workers and collect samples.
+
+    Each worker repeatedly picks a scenario by weight and plays it in a
+    new session (a fresh browser, with no cookies), until `duration`
+    seconds have passed or it has played `iterations` scenarios. Every
+    worker has its own random.Random derived from `seed`.
+
+    Returns (samples, failures, elapsed seconds). A scenario that
+    raises is recorded in `failures` as (scenario, traceback) and the
+    worker moves on to the next one.
+    """
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    results = [([], []) for _ in range(threads)]
+
+    def work(index):
+        samples, failures = results[index]
+        rng = random.Random(seed * 1000 + index)
+        deadline = time.monotonic() + duration if duration else None
+        played = 0
+        try:
+            while (iterations is None or played < iterations) and (
+                deadline is None or time.monotonic() < deadline
+            ):
+                name = rng.choices(names, weights)[0]
+                played += 1
+                try:
+                    SCENARIOS[name](
+                        session_factory(samples), fixtures, index, rng
+                    )
+                except Exception:
+                    failures.append((name, traceback.format_exc()))
+        finally:
+            # Each thread opened its own database connections
+            connections.close_all()
+
+    workers = [
+        threading.Thread(target=work, args=(index,), daemon=True)
+        for index in range(threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    samples = [sample for group, _ in results for sample in group]
+    failures = [failure for _, group in results for failure in group]
+    return samples, failures, elapsed
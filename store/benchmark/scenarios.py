@@ -0,0 +1,261 @@
+import json
+import re
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import ApiToken
+from accounts.reset_tokens import issue_reset_token
+from store.models import Store, Product
+from store.seeding import ADJECTIVES, NOUNS
+
+# The key is shown once, in the message after a token is created
+TOKEN_MESSAGE = re.compile(r"it will not be shown again: (\S+)")
+SORTS = ["", "newest", "price", "popularity", "rating"]
+
+
+class Fixtures:
+    """
+    Ids and accounts the scenarios use, read once before a run.
+
+    The benchmark expects a database filled by seed_marketplace: its
+    users are found by username prefix and share one password. The
+    earliest products are the seeder's best sellers, so sampling them
+    gives a realistic skew.
+    """
+
+    def __init__(self, prefix="seed", password="seedpass123", size=2000):
+        self.password = password
+        self.stores = list(
+            Store.objects.order_by("id").values_list("id", flat=True)[:size]
+        )
+        self.products = list(
+            Product.objects.filter(stock__gt=0)
+            .order_by("id")
+            .values_list("id", flat=True)[:size]
+        )
+        self.vendors = list(
+            User.objects.filter(username__startswith=f"{prefix}_vendor_")
+            .order_by("id")
+            .values_list("id", "username")[:size]
+        )
+        self.buyers = list(
+            User.objects.filter(username__startswith=f"{prefix}_buyer_")
+            .order_by("id")
+            .values_list("id", "username")[:size]
+        )
+        if not (self.stores and self.products and self.vendors
+                and self.buyers):
+            raise ValueError(
+                "The benchmark needs stores, products in stock and "
+                f"{prefix}_ vendors and buyers; run seed_marketplace first"
+            )
+        self.terms = [word.lower() for word in ADJECTIVES + NOUNS]
+
+    def vendor(self, worker):
+        """Return (id, username) of the vendor a worker logs in as."""
+        return self.vendors[worker % len(self.vendors)]
+
+    def buyer(self, worker):
+        """Return (id, username) of the buyer a worker logs in as."""
+        return self.buyers[worker % len(self.buyers)]
+
+
+def log_in(session, username, password):
+    """Open the login page and log in."""
+    session.get("login")
+    session.post("login", data={"username": username, "password": password})
+
+
+def anonymous(session, fixtures, worker, rng):
+    """Browse stores, products, search and the public API."""
+    store = rng.choice(fixtures.stores)
+    product = rng.choice(fixtures.products)
+    term = rng.choice(fixtures.terms)
+    sort = rng.choice(SORTS)
+
+    session.get("store_list")
+    session.get("product_list", [store], query={"sort": sort})
+    session.get("product_detail", [product])
+    session.get("search", query={"q": term})
+    session.get("api_get_products", query={"sort": sort})
+    session.get(
+        "api_get_store_products",
+        [store],
+        query={"sort": sort, "facets": 1},
+    )
+    session.get("api_get_vendor_stores", [rng.choice(fixtures.vendors)[0]])
+    session.get("api_search", query={"q": term, "in_stock": 1})
+
+    if rng.random() < 0.1:
+        # Exports stream whole catalogues, so only ask for recent changes
+        since = (timezone.now() - timedelta(hours=1)).isoformat()
+        session.get("api_export_store_products", [store],
+                    query={"since": since})
+        session.get(
+            "api_export_vendor_products",
+            [rng.choice(fixtures.vendors)[0]],
+            query={"since": since, "format": "csv"},
+        )
+
+
+def buyer(session, fixtures, worker, rng):
+    """Log in, fill a cart, check out and review a purchase."""
+    _, username = fixtures.buyer(worker)
+    product = rng.choice(fixtures.products)
+    other = rng.choice(fixtures.products)
+
+    log_in(session, username, fixtures.password)
+    session.get("product_detail", [product])
+    session.post("add_to_cart", [product], data={"quantity": 1})
+    session.post("add_to_cart", [other], data={"quantity": 1})
+    session.get("view_cart")
+    session.post("remove_from_cart", [other])
+    session.post("checkout", data={"idempotency_key": uuid.uuid4().hex})
+    session.get("leave_review", [product])
+    session.post(
+        "leave_review",
+        [product],
+        data={"rating": rng.randint(1, 5), "comment": "Benchmark review"},
+    )
+    session.get("logout")
+
+
+def vendor(session, fixtures, worker, rng):
+    """Log in and create, edit and delete a store and a product."""
+    vendor_id, username = fixtures.vendor(worker)
+    name = f"Benchmark {uuid.uuid4().hex[:12]}"
+    product = {
+        "name": "Benchmark product",
+        "description": "Made by the benchmark",
+        "price": "9.99",
+        "stock": 10,
+    }
+
+    log_in(session, username, fixtures.password)
+    session.get("vendor_dashboard")
+    session.get("create_store")
+    session.post("create_store", data={"name": name, "description": "x"})
+
+    # The views redirect without the new ids, so look them up
+    store_id = Store.objects.get(owner_id=vendor_id, name=name).id
+    session.get("vendor_store_detail", [store_id])
+    session.get("edit_store", [store_id])
+    session.post(
+        "edit_store",
+        [store_id],
+        data={"name": name, "description": "Edited"},
+    )
+    session.get("add_product", [store_id])
+    session.post("add_product", [store_id], data=product)
+
+    product_id = Product.objects.get(store_id=store_id).id
+    session.get("edit_product", [product_id])
+    session.post("edit_product", [product_id], data=product)
+    session.post("delete_product", [product_id])
+    session.post("delete_store", [store_id])
+    session.get("logout")
+
+
+def api(session, fixtures, worker, rng):
+    """Mint a token, write and read through the API, then revoke it."""
+    vendor_id, username = fixtures.vendor(worker)
+
+    log_in(session, username, fixtures.password)
+    session.get("api_tokens")
+    session.post(
+        "api_tokens",
+        data={
+            "name": "benchmark",
+            "scopes": ["stores:write", "products:write", "reviews:read"],
+        },
+    )
+    match = TOKEN_MESSAGE.search(session.get("api_tokens").text)
+    if match is None:
+        raise ValueError("Could not create an API token")
+    key = match.group(1)
+    auth = {"Authorization": f"Token {key}"}
+
+    response = session.post(
+        "api_create_store",
+        json_data={"name": f"Benchmark API {uuid.uuid4().hex[:12]}"},
+        headers=auth,
+    )
+    if response.status != 201:
+        raise ValueError(f"Creating a store returned {response.status}")
+    store_id = json.loads(response.text)["id"]
+    session.post(
+        "api_add_product",
+        [store_id],
+        json_data={"name": "API product", "price": "5.00", "stock": 3},
+        headers=auth,
+    )
+    rows = "".join(
+        f'{{"sku": "BENCH-{index}", "name": "Imported {index}", '
+        f'"price": "1.{index:02d}", "stock": {index}}}\n'
+        for index in range(20)
+    )
+    session.post(
+        "api_import_products",
+        [store_id],
+        body=rows.encode(),
+        content_type="application/x-ndjson",
+        headers=auth,
+    )
+    session.get(
+        "api_get_product_reviews",
+        [rng.choice(fixtures.products)],
+        headers=auth,
+    )
+
+    token_id = ApiToken.objects.get(
+        user_id=vendor_id, prefix=key[:8], revoked_at__isnull=True
+    ).id
+    session.post("revoke_api_token", [token_id])
+    session.post("delete_store", [store_id])
+    session.get("logout")
+
+
+def account(session, fixtures, worker, rng):
+    """Register, and request and open a password reset link."""
+    username = f"bench_{uuid.uuid4().hex[:16]}"
+
+    session.get("register")
+    session.post(
+        "register",
+        data={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": "benchpass123",
+            "confirm_password": "benchpass123",
+            "account_type": "buyer",
+        },
+    )
+    session.get("logout")
+
+    session.get("forgot_password")
+    session.post("forgot_password", data={"email": f"{username}@example.com"})
+
+    # The reset link goes out by email, so issue one directly to open it
+    with transaction.atomic():
+        token = issue_reset_token(User.objects.get(username=username))
+    session.get("reset_password", [token])
+
+
+SCENARIOS = {
+    "anonymous": anonymous,
+    "buyer": buyer,
+    "vendor": vendor,
+    "api": api,
+    "account": account,
+}
+DEFAULT_MIX = {
+    "anonymous": 50,
+    "buyer": 25,
+    "vendor": 10,
+    "api": 10,
+    "account": 5,
+}
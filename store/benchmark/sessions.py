@@ -0,0 +1,164 @@
+import json
+import time
+from collections import namedtuple
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import (
+    HTTPCookieProcessor,
+    HTTPRedirectHandler,
+    Request,
+    build_opener,
+)
+
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+# One timed request; `queries` is None when they cannot be counted
+Sample = namedtuple(
+    "Sample", ["name", "method", "status", "seconds", "queries"]
+)
+Response = namedtuple("Response", ["status", "text"])
+
+
+class QueryCounter:
+    """A database execute wrapper that counts the queries run."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Session:
+    """
+    One virtual user's browser or API client.
+
+    Requests are made by URL name, and every request is timed and
+    appended to `samples`. Redirects are not followed, so each sample
+    is exactly one view.
+    """
+
+    def __init__(self, samples):
+        self.samples = samples
+
+    def get(self, name, args=(), query=None, headers=None):
+        """GET a named route."""
+        return self.request("GET", name, args, query=query, headers=headers)
+
+    def post(self, name, args=(), data=None, json_data=None, body=None,
+             content_type=None, headers=None):
+        """POST a form, JSON (`json_data`) or a raw body to a named route."""
+        if json_data is not None:
+            body = json.dumps(json_data).encode()
+            content_type = "application/json"
+        return self.request(
+            "POST",
+            name,
+            args,
+            data=data,
+            body=body,
+            content_type=content_type,
+            headers=headers,
+        )
+
+    def request(self, method, name, args=(), query=None, data=None,
+                body=None, content_type=None, headers=None):
+        """Make one request, record its sample and return the Response."""
+        path = reverse(name, args=args)
+        if query:
+            path = f"{path}?{urlencode(query)}"
+
+        started = time.perf_counter()
+        status, text, queries = self.send(
+            method, path, data, body, content_type, headers or {}
+        )
+        self.samples.append(
+            Sample(name, method, status, time.perf_counter() - started,
+                   queries)
+        )
+        return Response(status, text)
+
+    def send(self, method, path, data, body, content_type, headers):
+        """Return (status, body text, query count) for one request."""
+        raise NotImplementedError
+
+
+class ClientSession(Session):
+    """Run requests in this process through Django's test client."""
+
+    def __init__(self, samples):
+        super().__init__(samples)
+        self.client = Client()
+
+    def send(self, method, path, data, body, content_type, headers):
+        """Call the view in-process, counting its queries."""
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            if method == "GET":
+                response = self.client.get(path, headers=headers)
+            elif body is not None:
+                response = self.client.post(
+                    path, body, content_type=content_type, headers=headers
+                )
+            else:
+                response = self.client.post(path, data or {}, headers=headers)
+
+            # Streamed bodies run their queries while being read
+            if response.streaming:
+                content = b"".join(response.streaming_content)
+            else:
+                content = response.content
+        return response.status_code, content.decode(), counter.count
+
+
+class NoRedirect(HTTPRedirectHandler):
+    """Hand redirects back as responses instead of following them."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class HttpSession(Session):
+    """Send requests to a running server, keeping cookies like a browser."""
+
+    def __init__(self, samples, base_url, timeout=30):
+        super().__init__(samples)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(
+            HTTPCookieProcessor(self.cookies), NoRedirect
+        )
+
+    def csrf_token(self):
+        """Return the CSRF cookie set by an earlier page, if any."""
+        for cookie in self.cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        return ""
+
+    def send(self, method, path, data, body, content_type, headers):
+        """Send the request over HTTP; queries cannot be counted."""
+        headers = dict(headers)
+        if method == "POST":
+            if body is None:
+                body = urlencode(data or {}, doseq=True).encode()
+                content_type = "application/x-www-form-urlencoded"
+            headers["Content-Type"] = content_type
+            headers["X-CSRFToken"] = self.csrf_token()
+            headers["Referer"] = self.base_url + path
+
+        request = Request(
+            self.base_url + path, data=body, headers=headers, method=method
+        )
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                return response.status, response.read().decode(), None
+        except HTTPError as error:
+            return error.code, error.read().decode(errors="replace"), None
+        except (URLError, OSError) as error:
+            return 0, str(error), None
@@ -0,0 +1,143 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+
+# Keyset orderings for ?sort=, each backed by an index on (store, ...)
+SORTS = {
+    "": ["created_at", "id"],
+    "newest": ["-created_at", "-id"],
+    "price": ["price", "id"],
+    "price_desc": ["-price", "-id"],
+    "popularity": ["-review_count", "-rating_average", "-id"],
+    "rating": ["-rating_average", "-review_count", "-id"],
+}
+SORT_LABELS = {
+    "": "Default order",
+    "newest": "Newest",
+    "price": "Price: low to high",
+    "price_desc": "Price: high to low",
+    "popularity": "Most popular",
+    "rating": "Top rated",
+}
+
+
+def parse_price(value, name):
+    """Return a price query parameter as a Decimal, or None if empty."""
+    if not value:
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation as exc:
+        raise ValueError(name) from exc
+    if not price.is_finite() or price < 0:
+        raise ValueError(name)
+    return price
+
+
+def parse_filters(params):
+    """
+    Read the browsing filters and sort order from query parameters.
+
+    Raises ValueError for an unknown sort or a malformed value.
+    """
+    sort = params.get("sort", "")
+    if sort not in SORTS:
+        raise ValueError("sort")
+
+    min_rating = params.get("min_rating")
+    if min_rating:
+        try:
+            min_rating = float(min_rating)
+        except ValueError as exc:
+            raise ValueError("min_rating") from exc
+        if not 0 <= min_rating <= 5:
+            raise ValueError("min_rating")
+    else:
+        min_rating = None
+
+    return {
+        "min_price": parse_price(params.get("min_price"), "min_price"),
+        "max_price": parse_price(params.get("max_price"), "max_price"),
+        "in_stock": params.get("in_stock") in ("1", "true", "on"),
+        "min_rating": min_rating,
+        "sort": sort,
+    }
+
+
+def filter_q(filters, skip=()):
+    """Return the filters as one Q, leaving out the groups in `skip`."""
+    q = Q()
+    if "price" not in skip:
+        if filters["min_price"] is not None:
+            q &= Q(price__gte=filters["min_price"])
+        if filters["max_price"] is not None:
+            q &= Q(price__lte=filters["max_price"])
+    if "stock" not in skip and filters["in_stock"]:
+        q &= Q(stock__gt=F("reserved"))
+    if filters["min_rating"] is not None:
+        q &= Q(rating_average__gte=filters["min_rating"])
+    return q
+
+
+def cache_parts(filters):
+    """Return the filters as strings for a cache key."""
+    return [
+        filters["min_price"],
+        filters["max_price"],
+        int(filters["in_stock"]),
+        filters["min_rating"],
+        filters["sort"],
+    ]
+
+
+def price_buckets():
+    """Return (label, low, high) for each price facet; high may be None."""
+    bounds = [Decimal(str(bound)) for bound in settings.PRICE_FACETS]
+    buckets = []
+    for low, high in zip(bounds, bounds[1:] + [None]):
+        label = f"{low}+" if high is None else f"{low}-{high}"
+        buckets.append((label, low, high))
+    return buckets
+
+
+def facet_counts(products, filters):
+    """
+    Count products per price bucket and by stock in a single query.
+
+    Each facet counts the products that match every other filter, so
+    a bucket shows how many results choosing it would give. All counts
+    are conditional aggregates over one scan of the store's products.
+    """
+    in_stock = Q(stock__gt=F("reserved"))
+    other_filters = filter_q(filters, ["stock"])
+    aggregates = {
+        "in_stock": Count("id", filter=other_filters & in_stock),
+        "out_of_stock": Count("id", filter=other_filters & ~in_stock),
+    }
+
+    buckets = price_buckets()
+    for index, (_, low, high) in enumerate(buckets):
+        bucket = Q(price__gte=low)
+        if high is not None:
+            bucket &= Q(price__lt=high)
+        aggregates[f"price_{index}"] = Count(
+            "id", filter=filter_q(filters, ["price"]) & bucket
+        )
+
+    counts = products.aggregate(**aggregates)
+    return {
+        "price": [
+            {
+                "label": label,
+                "min": str(low),
+                "max": None if high is None else str(high),
+                "count": counts[f"price_{index}"],
+            }
+            for index, (label, low, high) in enumerate(buckets)
+        ],
+        "stock": {
+            "in_stock": counts["in_stock"],
+            "out_of_stock": counts["out_of_stock"],
+        },
+    }
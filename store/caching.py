@@ -0,0 +1,109 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import Http404
+
+from monitoring.metrics import count_lookup
+
+from .models import Store, Product
+
+MISSING = object()
+
+
+def version_key(scope):
+    """Return the cache key that holds a scope's version counter."""
+    return f"catalog:version:{scope}"
+
+
+def get_version(*scopes):
+    """
+    Return the combined current version of the given scopes.
+
+    A scope is a string such as "stores", "vendor:3", "store:7" or
+    "product:42". Counters that are not in the cache (never set, or
+    evicted) start from the current time rather than 1 so that a
+    restarted counter can never reuse a version that is still cached.
+    """
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def bump(*scopes):
+    """Invalidate everything cached under the given scopes."""
+    for scope in set(scopes):
+        key = version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_on_commit(*scopes):
+    """Bump the scopes once the current transaction has committed."""
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def product_scopes(products):
+    """Return the scopes to bump when the given products change."""
+    scopes = set()
+    for product in products:
+        scopes.add(f"product:{product.id}")
+        scopes.add(f"store:{product.store_id}")
+    return scopes
+
+
+def get_or_set(name, scopes, compute, *parts):
+    """
+    Read a value through the cache, keyed by the scopes' versions.
+
+    Bumping any of the scopes changes the key, so stale entries are
+    simply never read again and expire on their own.
+    """
+    key = ":".join(
+        ["catalog", name, *[str(part) for part in parts], get_version(*scopes)]
+    )
+    value = cache.get(key, MISSING)
+    count_lookup("catalog", value is not MISSING)
+
+    if value is MISSING:
+        value = compute()
+        cache.set(key, value, settings.CATALOG_CACHE_TIMEOUT)
+
+    return value
+
+
+def get_store_or_404(store_id):
+    """Return a store from the cache or the database, or raise Http404."""
+    store = get_or_set(
+        "store",
+        [f"store:{store_id}"],
+        lambda: Store.objects.filter(id=store_id).first(),
+        store_id,
+    )
+    if store is None:
+        raise Http404("No Store matches the given query.")
+    return store
+
+
+def get_product_or_404(product_id):
+    """Return a product, with its store, from the cache or the database."""
+    product = get_or_set(
+        "product",
+        [f"product:{product_id}"],
+        lambda: Product.objects.select_related("store")
+        .filter(id=product_id)
+        .first(),
+        product_id,
+    )
+    if product is None:
+        raise Http404("No Product matches the given query.")
+    return product
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Cart, CartItem, StockHold
+from .reservations import release
+
+CART_SESSION_KEY = "cart_id"
+
+
+def get_cart(request, create=False):
+    """
+    Return the cart referenced by the session, or None.
+
+    Only the cart id is kept in the session so adding to the cart does
+    not rewrite the session row. When `create` is True a new cart is
+    made if the session has none.
+    """
+    cart_id = request.session.get(CART_SESSION_KEY)
+    cart = None
+
+    if cart_id is not None:
+        cart = Cart.objects.filter(id=cart_id, user=request.user).first()
+
+    if cart is None and create:
+        cart = Cart.objects.create(user=request.user)
+        request.session[CART_SESSION_KEY] = cart.id
+
+    return cart
+
+
+def touch(cart):
+    """Mark the cart as used now, so it is not purged as abandoned."""
+    Cart.objects.filter(id=cart.id).update(updated_at=timezone.now())
+
+
+def add_item(cart, product, quantity):
+    """Add `quantity` of a product to the cart with an atomic increment."""
+    touch(cart)
+    updated = CartItem.objects.filter(cart=cart, product=product).update(
+        quantity=F("quantity") + quantity
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(
+                cart=cart,
+                product=product,
+                quantity=quantity,
+            )
+    except IntegrityError:
+        # Another request created the line first, so add to it instead
+        CartItem.objects.filter(cart=cart, product=product).update(
+            quantity=F("quantity") + quantity
+        )
+
+
+def remove_item(cart, product_id):
+    """Remove a product from the cart and return True if it was there."""
+    touch(cart)
+    deleted, _ = CartItem.objects.filter(
+        cart=cart,
+        product_id=product_id,
+    ).delete()
+    return bool(deleted)
+
+
+def get_quantities(cart):
+    """Return a dict mapping product id to the quantity in the cart."""
+    return dict(cart.items.values_list("product_id", "quantity"))
+
+
+def get_lines(cart):
+    """
+    Return the cart lines priced from the current product rows.
+
+    All lines are loaded with one query and all amounts are Decimals.
+    """
+    items = cart.items.select_related("product").order_by("id")
+    lines = []
+    total = Decimal("0.00")
+
+    for item in items:
+        subtotal = item.product.price * item.quantity
+        total += subtotal
+        lines.append(
+            {
+                "product_id": item.product_id,
+                "name": item.product.name,
+                "price": item.product.price,
+                "quantity": item.quantity,
+                "subtotal": subtotal,
+            }
+        )
+
+    return lines, total
+
+
+def clear(request, cart):
+    """Delete the cart and forget it in the session."""
+    cart.delete()
+    request.session.pop(CART_SESSION_KEY, None)
+
+
+def purge_abandoned(batch_size=1000):
+    """
+    Delete carts untouched for CART_TTL_DAYS and return the count.
+
+    Carts are deleted in batches of primary keys, found through the
+    updated_at index. Any holds they still have are released first, so
+    their units go back to available stock.
+    """
+    cutoff = timezone.now() - timedelta(days=settings.CART_TTL_DAYS)
+    total = 0
+
+    while True:
+        ids = list(
+            Cart.objects.filter(updated_at__lt=cutoff)
+            .order_by("updated_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        with transaction.atomic():
+            release(StockHold.objects.filter(cart_id__in=ids))
+            Cart.objects.filter(id__in=ids).delete()
+        total += len(ids)
@@ -0,0 +1,14 @@
+from django.db import connection
+
+
+def upsert_options(unique_fields, update_fields):
+    """
+    Return the bulk_create() arguments for an insert-or-update.
+
+    MySQL and MariaDB resolve conflicts on any unique key and reject an
+    explicit conflict target, while SQLite and PostgreSQL require one.
+    """
+    options = {"update_conflicts": True, "update_fields": update_fields}
+    if connection.features.supports_update_conflicts_with_target:
+        options["unique_fields"] = unique_fields
+    return options
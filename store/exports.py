@@ -0,0 +1,98 @@
+import csv
+import json
+from datetime import datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Product
+from .pagination import iterate
+from .fast_serializers import ValuesSerializer
+from .serializers import ProductSerializer
+
+FORMATS = ("ndjson", "csv")
+CONTENT_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Rows come out oldest change first, so a client can resume from the
+# updated_at of the last row it received
+EXPORT_ORDERING = ["updated_at", "id"]
+PRODUCT_VALUES = ValuesSerializer(ProductSerializer)
+
+
+class Echo:
+    """Stand-in file for csv.writer that hands each line straight back."""
+
+    def write(self, value):
+        """Return the formatted line instead of storing it."""
+        return value
+
+
+def parse_since(value):
+    """
+    Parse a ?since= date or datetime, treating naive values as local time.
+
+    Raises ValueError when the value is not a date or datetime.
+    """
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        since = datetime.combine(day, time.min)
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def export_queryset(store_id=None, vendor_id=None, since=None):
+    """Return the products to export for a store or a vendor."""
+    products = Product.objects.all()
+    if store_id is not None:
+        products = products.filter(store_id=store_id)
+    if vendor_id is not None:
+        products = products.filter(store__owner_id=vendor_id)
+    if since is not None:
+        products = products.filter(updated_at__gte=since)
+    return products
+
+
+def export_rows(products, chunk_size=None):
+    """Yield each product as the dict the product API returns."""
+    rows = iterate(
+        PRODUCT_VALUES.values(products, *EXPORT_ORDERING),
+        EXPORT_ORDERING,
+        chunk_size or settings.EXPORT_CHUNK_SIZE,
+    )
+    return PRODUCT_VALUES.stream(rows)
+
+
+def encode_ndjson(rows):
+    """Yield one line of JSON per row."""
+    for row in rows:
+        yield json.dumps(
+            row,
+            cls=JSONEncoder,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ) + "\n"
+
+
+def encode_csv(rows):
+    """Yield a CSV header line and then one line per row."""
+    writer = csv.writer(Echo())
+    fields = ProductSerializer.Meta.fields
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(
+            ["" if row[field] is None else row[field] for field in fields]
+        )
+
+
+def export_lines(products, format, chunk_size=None):
+    """Yield the export of `products` line by line in `format`."""
+    rows = export_rows(products, chunk_size)
+    if format == "csv":
+        return encode_csv(rows)
+    return encode_ndjson(rows)
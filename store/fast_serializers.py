@@ -0,0 +1,192 @@
+from decimal import Decimal
+from functools import lru_cache
+
+from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+
+# Fields whose to_representation() returns database values unchanged
+# (str, int, float, bool or a primary key), so they can be copied as-is
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def decimal_encoder(field):
+    """
+    Return a fast to_representation() for a DecimalField.
+
+    Values read from the database already carry the field's decimal
+    places, so DRF's quantize() would not change them and they can be
+    formatted directly. Anything else goes through the field.
+    """
+    if (
+        field.decimal_places is None
+        or field.normalize_output
+        or field.localize
+        or not getattr(
+            field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+        )
+    ):
+        return lambda: field.to_representation
+
+    exponent = -field.decimal_places
+    max_digits = field.max_digits
+
+    def encode(value):
+        if isinstance(value, Decimal):
+            sign, digits, value_exponent = value.as_tuple()
+            if value_exponent == exponent and (
+                max_digits is None or len(digits) <= max_digits
+            ):
+                return f"{value:f}"
+        return field.to_representation(value)
+
+    return lambda: encode
+
+
+def datetime_encoder(field):
+    """
+    Return a fast to_representation() for an ISO 8601 DateTimeField.
+
+    DRF looks up the current timezone for every value; here it is
+    looked up once per list, when the encoder is bound.
+    """
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if (
+        output_format is None
+        or output_format.lower() != ISO_8601
+        or hasattr(field, "timezone")
+    ):
+        return lambda: field.to_representation
+
+    def bind():
+        field_timezone = field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def encode(value):
+            if value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+            return value
+
+        return encode
+
+    return bind
+
+
+def field_encoder(field):
+    """Return a function that binds an encoder for one field."""
+    if isinstance(field, serializers.DecimalField):
+        return decimal_encoder(field)
+    if isinstance(field, serializers.DateTimeField):
+        return datetime_encoder(field)
+    return lambda: field.to_representation
+
+
+class ValuesSerializer:
+    """
+    Serialise values() rows exactly like a DRF ModelSerializer.
+
+    The field list, sources and per-field encoders are worked out once
+    from the serializer class. Each row is then a plain dict built from
+    a values() query, with only the fields that need converting (such
+    as decimals and datetimes) passed through an encoder, so no model
+    instances or serializer objects are created per row.
+
+    `fields` and `expand` select a sparse fieldset as FieldsetMixin
+    does. Only the selected columns are fetched, and expanded objects
+    are read through joins in the same query.
+    """
+
+    def __init__(self, serializer_class, fields=None, expand=(), prefix=""):
+        self.serializer_class = serializer_class
+        self.columns = []
+        self.sources = []
+
+        if fields is None and not expand:
+            serializer = serializer_class()
+        else:
+            serializer = serializer_class(fields=fields, expand=expand)
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*" or "." in field.source:
+                raise ValueError(
+                    f"{serializer_class.__name__}.{name} is not a column"
+                )
+
+            source = f"{prefix}{field.source}"
+            self.sources.append(source)
+
+            if isinstance(field, serializers.BaseSerializer):
+                nested = ValuesSerializer(type(field), prefix=f"{source}__")
+                self.sources.extend(nested.sources)
+                self.columns.append((name, source, None, nested))
+            elif isinstance(field, PASSTHROUGH_FIELDS):
+                self.columns.append((name, source, None, None))
+            else:
+                encoder = field_encoder(field)
+                self.columns.append((name, source, encoder, None))
+
+    def values(self, queryset, *extra):
+        """
+        Return `queryset` as values() rows with every field needed.
+
+        `extra` names further columns to fetch, such as the ordering
+        used for keyset pagination; a leading "-" is ignored.
+        """
+        extra = [name.lstrip("-") for name in extra]
+        return queryset.values(*dict.fromkeys([*self.sources, *extra]))
+
+    def bind(self):
+        """Return a function that turns one values() row into output."""
+        columns = [
+            (
+                name,
+                source,
+                bind() if bind else None,
+                nested.bind() if nested else None,
+            )
+            for name, source, bind, nested in self.columns
+        ]
+
+        def build(row):
+            data = {}
+            for name, source, encode, nested in columns:
+                value = row[source]
+                if value is not None:
+                    if nested is not None:
+                        value = nested(row)
+                    elif encode is not None:
+                        value = encode(value)
+                data[name] = value
+            return data
+
+        return build
+
+    def stream(self, rows):
+        """Yield each values() row as the serializer would return it."""
+        build = self.bind()
+        for row in rows:
+            yield build(row)
+
+    def to_representation(self, row):
+        """Return one values() row as the serializer would."""
+        return self.bind()(row)
+
+    def many(self, rows):
+        """Return a list of values() rows as the serializer would."""
+        return list(self.stream(rows))
+
+
+@lru_cache(maxsize=256)
+def get_values_serializer(serializer_class, fields=None, expand=()):
+    """Return a shared ValuesSerializer for a fieldset."""
+    return ValuesSerializer(serializer_class, fields, expand)
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+FORM_FIELD = "idempotency_key"
+
+
+def new_key():
+    """Return a fresh key for a form's hidden idempotency field."""
+    return uuid.uuid4().hex
+
+
+def get_key(request):
+    """Return the idempotency key sent in the header or form, if any."""
+    key = request.headers.get(HEADER)
+    if not key and request.method == "POST":
+        key = request.POST.get(FORM_FIELD)
+    return (key or "").strip()[:255]
+
+
+def get_fingerprint(request):
+    """Hash the parts of the request a repeat must match."""
+    data = getattr(request, "data", request.POST)
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    data = {
+        name: value
+        for name, value in data.items()
+        if name not in ("csrfmiddlewaretoken", FORM_FIELD)
+    }
+    payload = json.dumps(
+        [request.method, request.path, data],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def claim(request, scope, key):
+    """
+    Insert the key, or return the stored record if it already exists.
+
+    The unique constraint makes the INSERT the arbiter between
+    concurrent duplicates: exactly one request creates the row and runs
+    the view, every other one gets the existing row back.
+    """
+    lookup = {"user": request.user, "scope": scope, "key": key}
+    window = timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    IdempotencyKey.objects.filter(
+        created_at__lt=timezone.now() - window,
+        **lookup,
+    ).delete()
+
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                fingerprint=get_fingerprint(request),
+                **lookup,
+            )
+        return record, True
+    except IntegrityError:
+        return IdempotencyKey.objects.get(**lookup), False
+
+
+def store_response(record, response):
+    """Save enough of a response to replay it later."""
+    record.status_code = response.status_code
+
+    if isinstance(response, Response):
+        record.content_type = "application/json"
+        record.body = json.dumps(response.data, cls=JSONEncoder)
+    else:
+        record.content_type = response.get("Content-Type", "")
+        record.location = response.get("Location", "")
+        if not response.streaming:
+            record.body = response.content.decode(response.charset)
+
+    record.save(
+        update_fields=["status_code", "content_type", "location", "body"]
+    )
+
+
+def replay(request, record):
+    """Rebuild the stored response for a repeated request."""
+    if hasattr(request, "data"):
+        response = Response(
+            json.loads(record.body) if record.body else None,
+            status=record.status_code,
+        )
+    else:
+        messages.info(request, "This request was already processed")
+        if record.location:
+            response = HttpResponseRedirect(record.location)
+            response.status_code = record.status_code
+        else:
+            response = HttpResponse(
+                record.body,
+                status=record.status_code,
+                content_type=record.content_type or None,
+            )
+
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def reject(request, message, status_code):
+    """Return an error for a key that cannot be replayed."""
+    if hasattr(request, "data"):
+        return Response({"error": message}, status=status_code)
+
+    return HttpResponse(message, status=status_code)
+
+
+def idempotent(scope):
+    """
+    Run a POST view at most once per idempotency key.
+
+    The key comes from the `Idempotency-Key` header or, for HTML forms,
+    a hidden `idempotency_key` field. Requests without a key run as
+    normal. A repeat of a finished request gets the stored response
+    back, a repeat that arrives while the first is still running gets
+    409 Conflict, and reusing a key with a different payload gets 422.
+    For DRF views this decorator goes below the DRF decorators so that
+    `request.user` is already authenticated.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            key = get_key(request)
+            if not key or request.method != "POST":
+                return view(request, *args, **kwargs)
+
+            record, created = claim(request, scope, key)
+
+            if not created:
+                if record.fingerprint != get_fingerprint(request):
+                    return reject(
+                        request,
+                        "Idempotency key was used with a different request",
+                        status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                if not record.is_complete():
+                    return reject(
+                        request,
+                        "A request with this idempotency key is in progress",
+                        status.HTTP_409_CONFLICT,
+                    )
+                return replay(request, record)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+
+            store_response(record, response)
+            return response
+
+        return wrapped
+
+    return decorator
+
+
+def purge_expired(batch_size=1000):
+    """Delete keys older than the replay window and return the count."""
+    cutoff = timezone.now() - timedelta(
+        hours=settings.IDEMPOTENCY_KEY_TTL_HOURS
+    )
+    total = 0
+
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(created_at__lt=cutoff).values_list(
+                "id", flat=True
+            )[:batch_size]
+        )
+        if not ids:
+            return total
+        IdempotencyKey.objects.filter(id__in=ids).delete()
+        total += len(ids)
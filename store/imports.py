@@ -0,0 +1,159 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from monitoring.nplusone import allow_repeats
+
+from .caching import bump_on_commit, product_scopes
+from .db import upsert_options
+from .models import Product
+from .search import index_products
+from .serializers import ProductImportSerializer
+
+FORMATS = ("ndjson", "csv")
+
+
+class ImportFormatError(Exception):
+    """Raised when an upload cannot be read as the declared format."""
+
+
+def decode_lines(stream):
+    """Yield the text lines of a binary stream, one at a time."""
+    return codecs.iterdecode(stream, "utf-8-sig")
+
+
+def read_ndjson(lines):
+    """Yield (line number, row) pairs from newline-delimited JSON."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None
+            continue
+        yield number, row if isinstance(row, dict) else None
+
+
+def read_csv(lines):
+    """Yield (line number, row) pairs from CSV with a header line."""
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "sku" not in reader.fieldnames:
+        raise ImportFormatError("The CSV header must include a sku column")
+    for row in reader:
+        row.pop(None, None)
+        yield reader.line_num, row
+
+
+def read_rows(stream, format):
+    """
+    Yield (line number, row) pairs from an uploaded file or stream.
+
+    A row that is not a JSON object comes back as None. Input that
+    cannot be read at all raises ImportFormatError.
+    """
+    lines = decode_lines(stream)
+    reader = read_csv(lines) if format == "csv" else read_ndjson(lines)
+    try:
+        yield from reader
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFormatError(str(exc)) from exc
+
+
+def upsert_chunk(store, rows):
+    """
+    Write one chunk of validated rows, matched on SKU.
+
+    Returns (created, updated). Existing products are found with one
+    query and the rows are written with a bulk insert that updates rows
+    whose SKU already exists, so a chunk costs a fixed number of
+    queries however many rows it holds. An update only overwrites the
+    columns a row supplies: rows are grouped by their set of columns,
+    with one bulk insert per group, so a file without descriptions
+    keeps the stored ones.
+    """
+    by_sku = {row["sku"]: row for row in rows}
+    existing = set(
+        Product.objects.filter(store=store, sku__in=by_sku).values_list(
+            "sku", flat=True
+        )
+    )
+
+    groups = {}
+    for row in by_sku.values():
+        groups.setdefault(frozenset(row), []).append(row)
+
+    with transaction.atomic():
+        for columns, group in groups.items():
+            update_fields = sorted(columns - {"sku"}) + ["updated_at"]
+            Product.objects.bulk_create(
+                [Product(store=store, **row) for row in group],
+                **upsert_options(["store", "sku"], update_fields),
+            )
+
+        # Bulk writes skip the save signals, so refresh the search index
+        # and cached pages here
+        products = list(
+            Product.objects.filter(store=store, sku__in=by_sku).only(
+                "id", "store_id", "name", "description"
+            )
+        )
+        index_products(products)
+        bump_on_commit(*product_scopes(products))
+
+    return len(by_sku) - len(existing), len(existing)
+
+
+def import_products(store, rows, chunk_size=None):
+    """
+    Validate and upsert products from (line number, row) pairs.
+
+    Rows are read and written chunk_size at a time, so apart from the
+    SKUs seen so far memory use does not grow with the size of the
+    upload. A SKU may appear once per upload: later rows with the same
+    SKU are rejected rather than silently overwriting the first. Returns
+    a report with the number of created, updated and rejected rows and
+    the errors of up to IMPORT_MAX_ERRORS rejected rows.
+    """
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    report = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+    rows = iter(rows)
+    seen = {}
+
+    def reject(number, errors):
+        report["failed"] += 1
+        if len(report["errors"]) < settings.IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": number, "errors": errors})
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return report
+
+        valid = []
+        for number, row in chunk:
+            if row is None:
+                reject(number, {"non_field_errors": ["Malformed row."]})
+                continue
+            serializer = ProductImportSerializer(data=row)
+            if not serializer.is_valid():
+                reject(number, serializer.errors)
+                continue
+            sku = serializer.validated_data["sku"]
+            if sku in seen:
+                message = f"Duplicate SKU, first seen on line {seen[sku]}."
+                reject(number, {"sku": [message]})
+                continue
+            seen[sku] = number
+            valid.append(serializer.validated_data)
+
+        if valid:
+            # A fixed number of queries per chunk, repeated by design
+            with allow_repeats():
+                created, updated = upsert_chunk(store, valid)
+            report["created"] += created
+            report["updated"] += updated
@@ -0,0 +1,185 @@
+import json
+import platform
+from functools import partial
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from store.benchmark import report
+from store.benchmark.runner import parse_mix, run
+from store.benchmark.scenarios import DEFAULT_MIX, Fixtures
+from store.benchmark.sessions import ClientSession, HttpSession
+
+
+class Command(BaseCommand):
+    """Load test every named route with a mix of user scenarios."""
+
+    help = (
+        "Drive the store and accounts routes with anonymous, buyer, "
+        "vendor, API and account scenarios on several threads, and "
+        "report throughput, latency percentiles and queries per view. "
+        "Needs a database filled by seed_marketplace, and writes to it."
+    )
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--url",
+            help="Base URL of a running server to load test, such as "
+            "http://127.0.0.1:8000. By default views are called "
+            "in-process, which also counts their queries.",
+        )
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30,
+            help="Seconds to run for (default 30).",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            help="Scenarios per thread, instead of running for --duration.",
+        )
+        parser.add_argument(
+            "--mix",
+            default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+            help="Scenario weights (default %(default)s).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Username prefix given to seed_marketplace.",
+        )
+        parser.add_argument(
+            "--password",
+            default="seedpass123",
+            help="Password given to seed_marketplace.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the results as JSON to this file.",
+        )
+        parser.add_argument(
+            "--baseline",
+            help="JSON results of an earlier run to compare against.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed p95 slowdown against the baseline "
+            "(default 0.2, that is 20%%).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error if any view regressed.",
+        )
+
+    def handle(self, *args, **options):
+        """Run the scenarios, then report and compare the results."""
+        if options["threads"] < 1:
+            raise CommandError("--threads must be at least 1")
+        try:
+            mix = parse_mix(options["mix"])
+            fixtures = Fixtures(options["prefix"], options["password"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        duration = None if options["iterations"] else options["duration"]
+        arguments = dict(
+            fixtures=fixtures,
+            mix=mix,
+            threads=options["threads"],
+            duration=duration,
+            iterations=options["iterations"],
+            seed=options["seed"],
+        )
+        if options["url"]:
+            factory = partial(HttpSession, base_url=options["url"])
+            samples, failures, elapsed = run(factory, **arguments)
+        else:
+            # The test client's host, and no 429s from a single address
+            with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                RATE_LIMIT_ENABLED=False,
+            ):
+                samples, failures, elapsed = run(ClientSession, **arguments)
+
+        if not samples:
+            raise CommandError("No requests were made")
+        summary = report.summarise(samples, elapsed)
+        self.print_summary(summary, failures, elapsed)
+
+        if options["output"]:
+            result = {
+                "metadata": {
+                    "started": timezone.now().isoformat(),
+                    "mode": options["url"] or "in-process",
+                    "database": connection.vendor,
+                    "django": django.get_version(),
+                    "python": platform.python_version(),
+                    "elapsed": round(elapsed, 2),
+                    "failures": len(failures),
+                    **{
+                        key: options[key]
+                        for key in ["threads", "iterations", "seed", "mix"]
+                    },
+                    "duration": duration,
+                },
+                **summary,
+            }
+            with open(options["output"], "w") as f:
+                json.dump(result, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if baseline is not None:
+            self.check_baseline(summary, baseline, options)
+
+    def print_summary(self, summary, failures, elapsed):
+        """Print the table, failed scenarios and routes not covered."""
+        for line in report.format_table(summary):
+            self.stdout.write(line)
+        self.stdout.write(
+            f"{summary['total']['requests']} requests in {elapsed:.1f}s"
+        )
+
+        for name, trace in failures[:5]:
+            self.stderr.write(f"Scenario {name} failed:\n{trace}")
+        if failures:
+            self.stderr.write(
+                self.style.ERROR(f"{len(failures)} scenarios failed")
+            )
+
+        missing = report.uncovered(summary)
+        if missing:
+            self.stdout.write(
+                self.style.WARNING(f"Not requested: {', '.join(missing)}")
+            )
+
+    def check_baseline(self, summary, baseline, options):
+        """Report views slower than the baseline and fail if asked to."""
+        regressions = report.compare(
+            summary, baseline, options["threshold"]
+        )
+        for name, metric, old, new in regressions:
+            self.stdout.write(
+                self.style.ERROR(f"REGRESSED {name} {metric}: {old} -> {new}")
+            )
+        if not regressions:
+            self.stdout.write(
+                self.style.SUCCESS("No regressions against the baseline")
+            )
+        elif options["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} regressions")
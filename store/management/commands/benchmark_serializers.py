@@ -0,0 +1,138 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from store.fast_serializers import ValuesSerializer
+from store.models import Store, Product, Review
+from store.renderers import FastJSONRenderer
+from store.serializers import (
+    StoreSerializer,
+    ProductSerializer,
+    ReviewSerializer,
+)
+
+CASES = [
+    (Store, StoreSerializer),
+    (Product, ProductSerializer),
+    (Review, ReviewSerializer),
+]
+
+
+class Command(BaseCommand):
+    """Compare the DRF serializers with the values() fast path."""
+
+    help = (
+        "Time serialising lists of stores, products and reviews through "
+        "DRF and through the values() fast path, and check both give "
+        "identical JSON. Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10000,
+            help="Number of rows per list (created if missing).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Runs per path; the fastest is reported.",
+        )
+
+    def handle(self, *args, **options):
+        """Create any missing rows, then time both paths."""
+        rows = options["rows"]
+
+        with transaction.atomic():
+            self.create_rows(rows)
+            for model, serializer_class in CASES:
+                self.compare(model, serializer_class, rows, options["repeat"])
+            transaction.set_rollback(True)
+
+    def create_rows(self, rows):
+        """Top up each table to `rows` rows with throwaway data."""
+        user = User.objects.create_user(f"benchmark-{time.time_ns()}")
+        store = Store.objects.create(owner=user, name="Benchmark")
+
+        missing = max(0, rows - Store.objects.count())
+        Store.objects.bulk_create(
+            [
+                Store(owner=user, name=f"Store {i}", description="x" * 200)
+                for i in range(missing)
+            ],
+            batch_size=1000,
+        )
+
+        missing = max(0, rows - Product.objects.count())
+        Product.objects.bulk_create(
+            [
+                Product(
+                    store=store,
+                    name=f"Product {i}",
+                    description="x" * 200,
+                    price="19.99",
+                    stock=10,
+                )
+                for i in range(missing)
+            ],
+            batch_size=1000,
+        )
+
+        missing = max(0, rows - Review.objects.count())
+        # The user is new, so it has reviewed none of the products yet;
+        # there are at least `rows` of them in all stores
+        products = Product.objects.order_by("id").values_list(
+            "id", flat=True
+        )[:missing]
+        Review.objects.bulk_create(
+            [
+                Review(product_id=product_id, reviewer=user, rating=4,
+                       comment="x" * 100)
+                for product_id in products
+            ],
+            batch_size=1000,
+        )
+
+    def compare(self, model, serializer_class, rows, repeat):
+        """Time both paths for one model and check their output."""
+        queryset = model.objects.order_by("id")[:rows]
+        fast = ValuesSerializer(serializer_class)
+
+        def drf_path():
+            data = serializer_class(list(queryset), many=True).data
+            return JSONRenderer().render(data)
+
+        def fast_path():
+            data = fast.many(fast.values(queryset))
+            return FastJSONRenderer().render(data)
+
+        drf_time, drf_body = self.time(drf_path, repeat)
+        fast_time, fast_body = self.time(fast_path, repeat)
+
+        if drf_body != fast_body:
+            raise CommandError(
+                f"{model.__name__}: the fast path output differs from DRF"
+            )
+
+        self.stdout.write(
+            f"{model.__name__:<8} {len(drf_body):>10} bytes  "
+            f"DRF {drf_time * 1000:8.1f} ms  "
+            f"values() {fast_time * 1000:8.1f} ms  "
+            f"({drf_time / fast_time:.1f}x)"
+        )
+
+    def time(self, function, repeat):
+        """Return (fastest time, result) over `repeat` calls."""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -0,0 +1,228 @@
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import ResetToken
+from outbox.models import OutboxMessage
+from store.browse import SORTS
+from store.models import (
+    Store,
+    Product,
+    OrderItem,
+    Review,
+    CartItem,
+    StockHold,
+    IdempotencyKey,
+    SearchPosting,
+)
+
+# SQLite reports a full table scan as "SCAN <table>" with no index
+SQLITE_FULL_SCAN = re.compile(r"\bSCAN (\w+)\b(?! USING)")
+POSTGRES_FULL_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def hot_queries():
+    """
+    Return (name, queryset) pairs for the queries the views run most.
+
+    The querysets are built the way the views build them, with
+    placeholder ids; only their plans matter.
+    """
+    now = timezone.now()
+    return [
+        ("store_list", Store.objects.order_by("created_at", "id")[:21]),
+        (
+            "product_list",
+            Product.objects.filter(store_id=1).order_by("created_at", "id")[
+                :21
+            ],
+        ),
+        *[
+            (
+                f"product_list?sort={sort}",
+                Product.objects.filter(store_id=1).order_by(*ordering)[:21],
+            )
+            for sort, ordering in SORTS.items()
+            if sort
+        ],
+        (
+            "product_list?sort=price&min_price=",
+            Product.objects.filter(store_id=1, price__gte=10).order_by(
+                "price", "id"
+            )[:21],
+        ),
+        # The facet counts aggregate over the same rows
+        ("product_list facets", Product.objects.filter(store_id=1)),
+        *[
+            (
+                f"api_get_products?sort={sort}",
+                Product.objects.select_related("store").order_by(*ordering)[
+                    :21
+                ],
+            )
+            for sort, ordering in SORTS.items()
+        ],
+        ("product_detail", Product.objects.filter(id=1)),
+        (
+            "product_detail reviews",
+            Review.objects.filter(product_id=1).order_by("created_at", "id"),
+        ),
+        (
+            "product_detail/leave_review already reviewed",
+            Review.objects.filter(product_id=1, reviewer_id=1),
+        ),
+        (
+            "leave_review has purchased",
+            OrderItem.objects.filter(order__buyer_id=1, product_id=1),
+        ),
+        (
+            "checkout unverified reviews",
+            Review.objects.filter(
+                product_id__in=[1, 2],
+                reviewer_id=1,
+                is_verified=False,
+            ),
+        ),
+        ("cart lines", CartItem.objects.filter(cart_id=1).order_by("id")),
+        (
+            "cart item",
+            CartItem.objects.filter(cart_id=1, product_id=1),
+        ),
+        (
+            "expired holds of a product",
+            StockHold.objects.filter(product_id=1, expires_at__lte=now),
+        ),
+        (
+            "release_stock_holds",
+            StockHold.objects.filter(expires_at__lte=now).order_by(
+                "expires_at"
+            )[:1000],
+        ),
+        (
+            "idempotency key",
+            IdempotencyKey.objects.filter(user_id=1, scope="x", key="x"),
+        ),
+        (
+            "reset_password",
+            ResetToken.objects.filter(digest="x", used=False),
+        ),
+        (
+            "issue_reset_token",
+            ResetToken.objects.filter(user_id=1, used=False),
+        ),
+        (
+            "purge_reset_tokens",
+            ResetToken.objects.filter(expiry_date__lt=now).order_by(
+                "expiry_date"
+            )[:1000],
+        ),
+        (
+            "send_outbox",
+            OutboxMessage.objects.filter(
+                status="pending",
+                next_attempt_at__lte=now,
+            ).order_by("next_attempt_at", "id")[:50],
+        ),
+        (
+            "api_get_vendor_stores",
+            Store.objects.filter(owner_id=1).order_by("created_at", "id")[
+                :21
+            ],
+        ),
+        (
+            "api_export_store_products",
+            Product.objects.filter(store_id=1, updated_at__gte=now).order_by(
+                "updated_at", "id"
+            )[:1000],
+        ),
+        (
+            "search candidates",
+            SearchPosting.objects.filter(term="x").order_by("-impact")[:1000],
+        ),
+        (
+            "search ranking",
+            SearchPosting.objects.filter(
+                term__in=["x", "y"], product_id__in=[1, 2]
+            ),
+        ),
+    ]
+
+
+def full_scans(queryset):
+    """Return (tables scanned in full, plan text) for a queryset."""
+    vendor = connection.vendor
+
+    if vendor == "mysql":
+        plan = queryset.explain(format="json")
+        tables = []
+
+        def walk(node):
+            if isinstance(node, dict):
+                if node.get("access_type") == "ALL":
+                    tables.append(node.get("table_name", "?"))
+                for value in node.values():
+                    walk(value)
+            elif isinstance(node, list):
+                for value in node:
+                    walk(value)
+
+        walk(json.loads(plan))
+        return tables, plan
+
+    plan = queryset.explain()
+    if vendor == "postgresql":
+        return POSTGRES_FULL_SCAN.findall(plan), plan
+    if vendor == "sqlite":
+        return SQLITE_FULL_SCAN.findall(plan), plan
+    raise CommandError(f"Plans on {vendor} are not supported")
+
+
+class Command(BaseCommand):
+    """Check that the hot queries are answered from indexes."""
+
+    help = (
+        "Run EXPLAIN on the queries behind the busiest views and fail if "
+        "any of them scans a whole table."
+    )
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Print every query plan, not just the failing ones.",
+        )
+
+    def handle(self, *args, **options):
+        """Explain each query and report full scans."""
+        failures = []
+
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # With small tables PostgreSQL prefers sequential scans
+                # even when an index fits; ask what it can use instead
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in hot_queries():
+                tables, plan = full_scans(queryset)
+                if tables:
+                    failures.append(name)
+                    self.stdout.write(
+                        self.style.ERROR(
+                            f"FULL SCAN {name}: {', '.join(tables)}"
+                        )
+                    )
+                else:
+                    self.stdout.write(f"ok        {name}")
+                if tables or options["plans"]:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} hot queries scan a whole table"
+            )
+        self.stdout.write(self.style.SUCCESS("All hot queries use indexes"))
@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.exports import (
+    FORMATS,
+    export_lines,
+    export_queryset,
+    parse_since,
+)
+
+
+class Command(BaseCommand):
+    """Dump products to an NDJSON or CSV file."""
+
+    help = "Export the catalogue, or one store's or vendor's products."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        owner = parser.add_mutually_exclusive_group()
+        owner.add_argument("--store", type=int, help="Only this store.")
+        owner.add_argument("--vendor", type=int, help="Only this vendor.")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            default="ndjson",
+            help="Output format.",
+        )
+        parser.add_argument(
+            "--since",
+            help="Only products changed at or after this date or datetime.",
+        )
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write, or - for standard output.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Number of products to read per query.",
+        )
+
+    def handle(self, *args, **options):
+        """Write the export one line at a time."""
+        since = None
+        if options["since"]:
+            try:
+                since = parse_since(options["since"])
+            except ValueError:
+                raise CommandError(f"Invalid --since: {options['since']}")
+
+        products = export_queryset(
+            store_id=options["store"],
+            vendor_id=options["vendor"],
+            since=since,
+        )
+        lines = export_lines(
+            products,
+            options["format"],
+            options["chunk_size"],
+        )
+
+        path = options["output"]
+        if path == "-":
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(path, "w", encoding="utf-8", newline="") as output:
+            output.writelines(lines)
@@ -0,0 +1,72 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.imports import (
+    FORMATS,
+    ImportFormatError,
+    import_products,
+    read_rows,
+)
+from store.models import Store
+
+
+class Command(BaseCommand):
+    """Import products into a store from an NDJSON or CSV file."""
+
+    help = "Create or update a store's products from a file, by SKU."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument("store_id", type=int)
+        parser.add_argument(
+            "path",
+            help="File to read, or - for standard input.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="Input format (default: csv for .csv files, else ndjson).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Number of rows to validate and write at a time.",
+        )
+
+    def handle(self, *args, **options):
+        """Stream the file into the store and print the report."""
+        store = Store.objects.filter(id=options["store_id"]).first()
+        if store is None:
+            raise CommandError(f"Store {options['store_id']} does not exist")
+
+        path = options["path"]
+        format = options["format"] or (
+            "csv" if path.endswith(".csv") else "ndjson"
+        )
+
+        stream = sys.stdin.buffer if path == "-" else open(path, "rb")
+        try:
+            report = import_products(
+                store,
+                read_rows(stream, format),
+                chunk_size=options["chunk_size"],
+            )
+        except ImportFormatError as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for error in report["errors"]:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        if report["failed"] > len(report["errors"]):
+            self.stderr.write(
+                f"... and {report['failed'] - len(report['errors'])} more"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report['created']}, updated {report['updated']}, "
+                f"failed {report['failed']}"
+            )
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from store.cart import purge_abandoned
+
+
+class Command(BaseCommand):
+    """Delete carts nobody has touched for CART_TTL_DAYS."""
+
+    help = "Delete abandoned carts in batches, releasing their holds."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of carts to delete per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        """Purge abandoned carts."""
+        deleted = purge_abandoned(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} abandoned carts")
+        )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from store.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    """Delete idempotency keys that are past their replay window."""
+
+    help = "Delete expired idempotency keys in batches."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of keys to delete per query.",
+        )
+
+    def handle(self, *args, **options):
+        """Purge expired keys."""
+        deleted = purge_expired(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired idempotency keys")
+        )
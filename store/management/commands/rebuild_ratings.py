@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.ratings import rebuild
+
+
+class Command(BaseCommand):
+    """Rebuild the rating aggregates stored on each product."""
+
+    help = "Recompute product rating aggregates from reviews and report drift."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drift, and exit with an error if any is found.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of products to read and update per query.",
+        )
+
+    def handle(self, *args, **options):
+        """Compare, and unless --check is given, fix the aggregates."""
+        drifted = rebuild(
+            fix=not options["check"],
+            batch_size=options["batch_size"],
+        )
+
+        if drifted:
+            sample = ", ".join(str(product_id) for product_id in drifted[:20])
+            self.stdout.write(
+                f"{len(drifted)} products had drifted (ids: {sample}"
+                f"{', ...' if len(drifted) > 20 else ''})"
+            )
+
+        if options["check"]:
+            if drifted:
+                raise CommandError("Rating aggregates are out of date")
+            self.stdout.write(self.style.SUCCESS("No drift found"))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"Rebuilt {len(drifted)} products")
+            )
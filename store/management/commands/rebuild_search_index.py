@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from store.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """Rebuild the product search index from scratch."""
+
+    help = "Reindex every product for search."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of products to index per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        """Index all products in batches."""
+        total = rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} products"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from store.reservations import reconcile_reserved, release_expired
+
+
+class Command(BaseCommand):
+    """Release expired stock holds back into available stock."""
+
+    help = "Release expired cart stock holds in batches."
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of holds to release per transaction.",
+        )
+        parser.add_argument(
+            "--reconcile",
+            action="store_true",
+            help="Also recompute every product's reserved counter.",
+        )
+
+    def handle(self, *args, **options):
+        """Release expired holds until none are left."""
+        total = 0
+
+        while True:
+            released = release_expired(batch_size=options["batch_size"])
+            total += released
+            if released < options["batch_size"]:
+                break
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Released {total} expired holds")
+        )
+
+        if options["reconcile"]:
+            corrected = reconcile_reserved()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Corrected the reserved counter of {corrected} products"
+                )
+            )
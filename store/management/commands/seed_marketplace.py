@@ -0,0 +1,123 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.caching import bump
+from store.search import rebuild_index
+from store.models import Product
+from store.seeding import MarketplaceSeeder
+
+
+class Command(BaseCommand):
+    """Fill the database with a synthetic marketplace for load testing."""
+
+    help = (
+        "Generate vendors, buyers, stores, products, orders and reviews "
+        "with skewed distributions, deterministically from --seed."
+    )
+
+    def add_arguments(self, parser):
+        """Register command line options."""
+        counts = {
+            "vendors": 100,
+            "buyers": 1000,
+            "stores": 200,
+            "products": 10000,
+            "orders": 5000,
+            "reviews": 20000,
+        }
+        for name, default in counts.items():
+            parser.add_argument(
+                f"--{name}",
+                type=int,
+                default=default,
+                help=f"Number of {name} to create (default {default}).",
+            )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent: higher gives fewer, bigger vendors, "
+            "stores and best sellers.",
+        )
+        parser.add_argument(
+            "--verified-ratio",
+            type=float,
+            default=0.7,
+            help="Share of reviews by a buyer who ordered the product.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows per INSERT and per transaction.",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="seed",
+            help="Prefix of the generated usernames and SKUs.",
+        )
+        parser.add_argument(
+            "--password",
+            default="seedpass123",
+            help="Password of every generated user.",
+        )
+        parser.add_argument(
+            "--index",
+            action="store_true",
+            help="Also add the new products to the search index.",
+        )
+
+    def handle(self, *args, **options):
+        """Generate the data and report what was created."""
+        if options["products"] and not options["stores"]:
+            raise CommandError("Products need at least one store")
+        if options["stores"] and not options["vendors"]:
+            raise CommandError("Stores need at least one vendor")
+        if options["orders"] and not (
+            options["buyers"] and options["products"]
+        ):
+            raise CommandError("Orders need buyers and products")
+
+        seeder = MarketplaceSeeder(
+            seed=options["seed"],
+            skew=options["skew"],
+            chunk_size=options["chunk_size"],
+            prefix=options["prefix"],
+            password=options["password"],
+            verified_ratio=options["verified_ratio"],
+            log=self.stdout.write,
+        )
+        started = time.monotonic()
+        try:
+            counts = seeder.run(
+                vendors=options["vendors"],
+                buyers=options["buyers"],
+                stores=options["stores"],
+                products=options["products"],
+                orders=options["orders"],
+                reviews=options["reviews"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options["index"]:
+            indexed = rebuild_index(
+                products=Product.objects.filter(
+                    id__gte=seeder.first_product
+                )
+            )
+            self.stdout.write(f"Indexed {indexed} products for search")
+        bump("stores")
+
+        elapsed = time.monotonic() - started
+        rows = sum(counts.values())
+        for name, count in counts.items():
+            self.stdout.write(f"{count:>12}  {name}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {rows} rows in {elapsed:.1f}s "
+                f"({rows / max(elapsed, 0.001):.0f} rows/s)"
+            )
+        )
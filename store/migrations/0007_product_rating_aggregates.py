@@ -0,0 +1,80 @@
+# Generated by Django 6.0.2 on 2026-10-17 05:58
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_aggregates(apps, schema_editor):
+    """Fill the new aggregate fields from the existing reviews."""
+    Product = apps.get_model("store", "Product")
+    Review = apps.get_model("store", "Review")
+
+    rows = Review.objects.values("product_id").annotate(
+        review_count=Count("id"),
+        verified_review_count=Count("id", filter=Q(is_verified=True)),
+        rating_sum=Sum("rating"),
+        **{
+            f"rating_{stars}_count": Count("id", filter=Q(rating=stars))
+            for stars in range(1, 6)
+        },
+    )
+    for row in rows.order_by():
+        product_id = row.pop("product_id")
+        row["rating_average"] = row["rating_sum"] / row["review_count"]
+        Product.objects.filter(id=product_id).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0006_idempotency_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="rating_1_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_2_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_3_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_4_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_5_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_average",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="verified_review_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-17 06:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0007_product_rating_aggregates"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["store", "created_at", "id"],
+                name="product_store_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["store", "rating_average", "review_count", "id"],
+                name="product_store_rating_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["product", "created_at", "id"],
+                name="review_product_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="store",
+            index=models.Index(
+                fields=["created_at", "id"], name="store_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="store",
+            index=models.Index(
+                fields=["owner", "created_at", "id"],
+                name="store_owner_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-17 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0010_product_sku"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["store", "updated_at", "id"],
+                name="product_store_updated_idx",
+            ),
+        ),
+    ]
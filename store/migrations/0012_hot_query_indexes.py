@@ -0,0 +1,76 @@
+# Generated by Django 6.0.2 on 2026-10-17 06:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    """
+    Keep only the first review per buyer and product.
+
+    The affected products' rating aggregates are recalculated from the
+    reviews that remain.
+    """
+    Product = apps.get_model("store", "Product")
+    Review = apps.get_model("store", "Review")
+
+    duplicates = (
+        Review.objects.values("product_id", "reviewer_id")
+        .annotate(count=Count("id"), first_id=Min("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    product_ids = set()
+    for row in duplicates:
+        Review.objects.filter(
+            product_id=row["product_id"],
+            reviewer_id=row["reviewer_id"],
+        ).exclude(id=row["first_id"]).delete()
+        product_ids.add(row["product_id"])
+
+    rows = (
+        Review.objects.filter(product_id__in=product_ids)
+        .values("product_id")
+        .annotate(
+            review_count=Count("id"),
+            verified_review_count=Count("id", filter=Q(is_verified=True)),
+            rating_sum=Sum("rating"),
+            **{
+                f"rating_{stars}_count": Count("id", filter=Q(rating=stars))
+                for stars in range(1, 6)
+            },
+        )
+    )
+    for row in rows.order_by():
+        product_id = row.pop("product_id")
+        row["rating_average"] = row["rating_sum"] / row["review_count"]
+        Product.objects.filter(id=product_id).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0011_product_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="orderitem",
+            index=models.Index(
+                fields=["product", "order"], name="orderitem_product_order_idx"
+            ),
+        ),
+        migrations.RunPython(
+            remove_duplicate_reviews,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="review",
+            constraint=models.UniqueConstraint(
+                fields=("product", "reviewer"),
+                name="unique_review_product_reviewer",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0012_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["store", "price", "id"], name="product_store_price_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["store", "review_count", "rating_average", "id"],
+                name="product_store_popular_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-17 07:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0014_global_product_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cart",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                fields=["updated_at"], name="cart_updated_idx"
+            ),
+        ),
+    ]
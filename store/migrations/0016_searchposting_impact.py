@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-17 09:40
+
+from django.db import migrations, models
+from django.db.models import Avg, F, FloatField, Value
+from django.db.models.functions import Cast
+
+# BM25 parameters, as in store/search.py when this migration was written
+K1 = 1.2
+B = 0.75
+
+
+def fill_impact(apps, schema_editor):
+    """Compute the impact of existing postings in one UPDATE."""
+    SearchDocument = apps.get_model("store", "SearchDocument")
+    SearchPosting = apps.get_model("store", "SearchPosting")
+
+    average = SearchDocument.objects.aggregate(average=Avg("length"))
+    frequency = Cast(F("frequency"), FloatField())
+    length = Cast(F("document_length"), FloatField())
+    SearchPosting.objects.update(
+        impact=frequency
+        * Value(K1 + 1)
+        / (
+            frequency
+            + Value(K1 * (1 - B))
+            + Value(K1 * B / (average["average"] or 1)) * length
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("store", "0015_cart_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="searchposting",
+            name="impact",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="searchposting",
+            index=models.Index(
+                fields=["term", "-impact"], name="search_term_impact_idx"
+            ),
+        ),
+        migrations.RunPython(fill_impact, migrations.RunPython.noop),
+    ]
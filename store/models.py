@@ -12,6 +12,19 @@ class Store(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        """Index the keyset orderings used by the store listings."""
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="store_created_idx",
+            ),
+            models.Index(
+                fields=["owner", "created_at", "id"],
+                name="store_owner_created_idx",
+            ),
+        ]
+
     def __str__(self):
         """Return a string representation of the Store."""
         return self.name
@@ -23,19 +36,110 @@ class Product(models.Model):
         Store,
         on_delete=models.CASCADE,
     )
+    # The vendor's own stock keeping unit, used to match bulk imports
+    sku = models.CharField(max_length=64, blank=True, null=True)
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField()
+    reserved = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set on every change to an exported field, for incremental exports
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Review aggregates, maintained by store.ratings
+    review_count = models.PositiveIntegerField(default=0)
+    verified_review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+
+    # Kept up to date with conditional UPDATEs by stock holds, checkout
+    # and reviews, so edits must never save them from a stale instance
+    COUNTER_FIELDS = (
+        "reserved",
+        "review_count",
+        "verified_review_count",
+        "rating_sum",
+        "rating_average",
+        "rating_1_count",
+        "rating_2_count",
+        "rating_3_count",
+        "rating_4_count",
+        "rating_5_count",
+    )
+
+    class Meta:
+        """Index the keyset orderings used by the product listings."""
+        indexes = [
+            models.Index(
+                fields=["store", "created_at", "id"],
+                name="product_store_created_idx",
+            ),
+            models.Index(
+                fields=["store", "rating_average", "review_count", "id"],
+                name="product_store_rating_idx",
+            ),
+            models.Index(
+                fields=["store", "updated_at", "id"],
+                name="product_store_updated_idx",
+            ),
+            models.Index(
+                fields=["store", "price", "id"],
+                name="product_store_price_idx",
+            ),
+            # The same orderings across every store, for /api/products/
+            models.Index(
+                fields=["created_at", "id"],
+                name="product_created_idx",
+            ),
+            models.Index(
+                fields=["price", "id"],
+                name="product_price_idx",
+            ),
+            models.Index(
+                fields=["review_count", "rating_average", "id"],
+                name="product_popular_idx",
+            ),
+            models.Index(
+                fields=["rating_average", "review_count", "id"],
+                name="product_rating_idx",
+            ),
+            models.Index(
+                fields=["store", "review_count", "rating_average", "id"],
+                name="product_store_popular_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["store", "sku"],
+                name="unique_store_sku",
+            ),
+        ]
 
     def __str__(self):
         """Return a string representation of the Product."""
         return self.name
 
+    @property
+    def available_stock(self):
+        """Return the stock that is not held in someone's cart."""
+        return max(self.stock - self.reserved, 0)
+
     def is_in_stock(self):
         """Return True if the product has stock available."""
-        return self.stock > 0
+        return self.available_stock > 0
+
+    def rating_histogram(self):
+        """Return (stars, count) pairs from five stars down to one."""
+        return [
+            (stars, getattr(self, f"rating_{stars}_count"))
+            for stars in range(5, 0, -1)
+        ]
 
 
 class Order(models.Model):
@@ -78,6 +182,15 @@ class OrderItem(models.Model):
         decimal_places=2,
     )
 
+    class Meta:
+        """Index purchases by product for the verified-buyer check."""
+        indexes = [
+            models.Index(
+                fields=["product", "order"],
+                name="orderitem_product_order_idx",
+            ),
+        ]
+
     def __str__(self):
         """Return a string representation of the OrderItem."""
         return f"{self.quantity} x {self.product.name}"
@@ -102,6 +215,21 @@ class Review(models.Model):
     is_verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        """Allow one review per buyer and product, and index the listing."""
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "reviewer"],
+                name="unique_review_product_reviewer",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["product", "created_at", "id"],
+                name="review_product_created_idx",
+            ),
+        ]
+
     def __str__(self):
         """Return a string representation of the Review."""
         return f"Review by {self.reviewer.username} on {self.product.name}"
@@ -110,3 +238,177 @@ class Review(models.Model):
         """Set whether the review is verified and save the change."""
         self.is_verified = status
         self.save()
+
+
+class Cart(models.Model):
+    """Represent a buyer's shopping cart, referenced from the session."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Moved forward whenever items are added or removed
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Index the column abandoned carts are purged by."""
+        indexes = [
+            models.Index(fields=["updated_at"], name="cart_updated_idx"),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the Cart."""
+        return f"Cart #{self.id} for {self.user.username}"
+
+
+class CartItem(models.Model):
+    """Represent a product and quantity held in a cart."""
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        related_name="items",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+    )
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        """Keep a single line per product in each cart."""
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product"],
+                name="unique_cart_product",
+            ),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the CartItem."""
+        return f"{self.quantity} x {self.product.name}"
+
+
+class StockHold(models.Model):
+    """Reserve stock of a product for a cart until the hold expires."""
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        related_name="holds",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        """Keep one hold per cart line and index the sweeper's lookup."""
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product"],
+                name="unique_hold_cart_product",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["expires_at"],
+                name="stockhold_expires_idx",
+            ),
+            models.Index(
+                fields=["product", "expires_at"],
+                name="stockhold_product_expires_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the StockHold."""
+        return f"Hold of {self.quantity} x {self.product.name}"
+
+
+class IdempotencyKey(models.Model):
+    """Remember the response to a request sent with an idempotency key."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+    )
+    scope = models.CharField(max_length=100)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=2000, blank=True)
+    body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        """Allow each key only once per user and view."""
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "scope", "key"],
+                name="unique_idempotency_key",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                name="idempotency_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the IdempotencyKey."""
+        return f"{self.scope} {self.key} for {self.user.username}"
+
+    def is_complete(self):
+        """Return True once the original request has finished."""
+        return self.status_code is not None
+
+
+class SearchDocument(models.Model):
+    """Hold the indexed length of a product for search ranking."""
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    length = models.PositiveIntegerField()
+
+    def __str__(self):
+        """Return a string representation of the SearchDocument."""
+        return f"Search document for {self.product.name}"
+
+
+class SearchPosting(models.Model):
+    """Record that a search term occurs in a product (inverted index)."""
+    term = models.CharField(max_length=64)
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+    )
+    frequency = models.PositiveIntegerField()
+    # Copied from SearchDocument so ranking needs no join
+    document_length = models.PositiveIntegerField()
+    # BM25 weight of the term in this product when it was indexed, so a
+    # term's best matches can be read first
+    impact = models.FloatField(default=0)
+
+    class Meta:
+        """Index postings by term for lookups and by product for updates."""
+        indexes = [
+            models.Index(
+                fields=["term", "-impact"],
+                name="search_term_impact_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["term", "product"],
+                name="unique_search_term_product",
+            ),
+        ]
+
+    def __str__(self):
+        """Return a string representation of the SearchPosting."""
+        return f"{self.term} in product #{self.product_id}"
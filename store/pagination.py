@@ -0,0 +1,215 @@
+from functools import reduce
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject
+
+CURSOR_SALT = "store.pagination"
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor cannot be decoded or does not fit the query."""
+
+
+class KeysetPage:
+    """Hold one page of results and the cursors around it."""
+
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.next_url = None
+        self.previous_url = None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def get_page_size(request):
+    """Return the page size asked for in ?page_size=, within limits."""
+    default = settings.PAGINATION_PAGE_SIZE
+    try:
+        size = int(request.GET.get("page_size", default))
+    except ValueError:
+        size = default
+    return max(1, min(size, settings.PAGINATION_MAX_PAGE_SIZE))
+
+
+def get_value(item, name):
+    """Read an ordering field from a model instance or a values() dict."""
+    if isinstance(item, dict):
+        return item[name]
+    return getattr(item, name)
+
+
+def encode_cursor(item, ordering, direction):
+    """Return an opaque, signed cursor pointing at `item`."""
+    values = [get_value(item, field.lstrip("-")) for field in ordering]
+    return signing.dumps(
+        [direction, [str(value) for value in values]],
+        salt=CURSOR_SALT,
+    )
+
+
+def decode_cursor(cursor, queryset, ordering):
+    """Return (direction, values) from a cursor made by encode_cursor."""
+    try:
+        direction, raw_values = signing.loads(cursor, salt=CURSOR_SALT)
+        if direction not in ("next", "previous"):
+            raise ValueError(direction)
+        if len(raw_values) != len(ordering):
+            raise ValueError(raw_values)
+
+        values = []
+        for field_name, raw in zip(ordering, raw_values):
+            field = queryset.model._meta.get_field(field_name.lstrip("-"))
+            values.append(field.to_python(raw))
+    except Exception as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+    return direction, values
+
+
+def seek(ordering, values, forward):
+    """
+    Build the keyset condition for rows after (or before) `values`.
+
+    For the ordering (a, b, id) this is
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND id > z),
+    with the comparison flipped for descending fields and for going
+    backwards, so the database can seek straight into the index.
+    """
+    conditions = []
+    for position, field in enumerate(ordering):
+        name = field.lstrip("-")
+        descending = field.startswith("-")
+        lookup = "gt" if descending != forward else "lt"
+
+        equal = {
+            earlier.lstrip("-"): values[index]
+            for index, earlier in enumerate(ordering[:position])
+        }
+        conditions.append(
+            Q(**equal, **{f"{name}__{lookup}": values[position]})
+        )
+
+    return reduce(lambda left, right: left | right, conditions)
+
+
+def paginate(queryset, ordering, cursor=None, page_size=None):
+    """
+    Return one KeysetPage of `queryset` ordered by `ordering`.
+
+    `ordering` is a list of field names, optionally prefixed with "-",
+    whose last entry must be unique (normally "id" or "-id"). Each page
+    costs one indexed range scan of page_size + 1 rows however deep the
+    client has paged, unlike OFFSET which rescans every skipped row.
+    """
+    page_size = page_size or settings.PAGINATION_PAGE_SIZE
+    direction = "next"
+
+    if cursor:
+        direction, values = decode_cursor(cursor, queryset, ordering)
+        forward = direction == "next"
+        queryset = queryset.filter(seek(ordering, values, forward))
+
+    if direction == "next":
+        queryset = queryset.order_by(*ordering)
+    else:
+        queryset = queryset.order_by(*[reverse(field) for field in ordering])
+
+    items = list(queryset[: page_size + 1])
+    has_more = len(items) > page_size
+    items = items[:page_size]
+
+    if direction == "previous":
+        items.reverse()
+
+    if not items:
+        return KeysetPage(items)
+
+    next_cursor = previous_cursor = None
+    if direction == "next":
+        if has_more:
+            next_cursor = encode_cursor(items[-1], ordering, "next")
+        if cursor:
+            previous_cursor = encode_cursor(items[0], ordering, "previous")
+    else:
+        next_cursor = encode_cursor(items[-1], ordering, "next")
+        if has_more:
+            previous_cursor = encode_cursor(items[0], ordering, "previous")
+
+    return KeysetPage(items, next_cursor, previous_cursor)
+
+
+def iterate(queryset, ordering, chunk_size=1000):
+    """
+    Yield every row of `queryset`, fetching chunk_size rows per query.
+
+    Each chunk is a keyset seek past the last row of the previous one,
+    so memory stays constant and every query is a short index range
+    scan, on any database backend and without a long-lived cursor.
+    """
+    queryset = queryset.order_by(*ordering)
+    chunk = list(queryset[:chunk_size])
+
+    while chunk:
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = [get_value(chunk[-1], field.lstrip("-")) for field in ordering]
+        chunk = list(
+            queryset.filter(seek(ordering, last, True))[:chunk_size]
+        )
+
+
+def reverse(field):
+    """Return the opposite ordering for one field name."""
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def page_url(request, cursor, absolute=False):
+    """Return the current URL with ?cursor= replaced, or None."""
+    if cursor is None:
+        return None
+
+    params = request.GET.copy()
+    params["cursor"] = cursor
+    url = f"{request.path}?{params.urlencode()}"
+    return request.build_absolute_uri(url) if absolute else url
+
+
+def page_links(request, page, absolute=False):
+    """Return (next_url, previous_url) for a KeysetPage."""
+    return (
+        page_url(request, page.next_cursor, absolute),
+        page_url(request, page.previous_cursor, absolute),
+    )
+
+
+def paginate_request(request, queryset, ordering, absolute=False):
+    """
+    Paginate `queryset` using the request's ?cursor= and ?page_size=.
+
+    The cursor is validated straight away (raising InvalidCursor), but
+    the page itself is only loaded when it is first used, so a template
+    that renders it inside a cached fragment skips the query on a hit.
+    The returned page has `next_url` and `previous_url` set.
+    """
+    cursor = request.GET.get("cursor") or None
+    if cursor:
+        decode_cursor(cursor, queryset, ordering)
+    page_size = get_page_size(request)
+
+    def load():
+        page = paginate(queryset, ordering, cursor, page_size)
+        page.next_url, page.previous_url = page_links(
+            request, page, absolute
+        )
+        return page
+
+    return SimpleLazyObject(load)
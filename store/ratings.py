@@ -0,0 +1,114 @@
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, Now
+from django.utils import timezone
+
+from .models import Product, Review
+
+RATINGS = range(1, 6)
+AGGREGATE_FIELDS = [
+    "review_count",
+    "verified_review_count",
+    "rating_sum",
+    "rating_average",
+] + [f"rating_{stars}_count" for stars in RATINGS]
+
+
+def update_average(products):
+    """Recompute `rating_average` in SQL from the stored sum and count."""
+    products.filter(review_count__gt=0).update(
+        rating_average=Cast(F("rating_sum"), FloatField())
+        / F("review_count")
+    )
+
+
+def record_review(review):
+    """Add a newly created review to its product's aggregates."""
+    product = Product.objects.filter(id=review.product_id)
+    rating = int(review.rating)
+
+    with transaction.atomic():
+        product.update(
+            review_count=F("review_count") + 1,
+            verified_review_count=(
+                F("verified_review_count") + int(review.is_verified)
+            ),
+            rating_sum=F("rating_sum") + rating,
+            **{f"rating_{rating}_count": F(f"rating_{rating}_count") + 1},
+            updated_at=Now(),
+        )
+        update_average(product)
+
+
+def record_verified(product_ids):
+    """Count one more verified review on each of the given products."""
+    if product_ids:
+        Product.objects.filter(id__in=product_ids).update(
+            verified_review_count=F("verified_review_count") + 1
+        )
+
+
+def calculate_aggregates():
+    """Return the aggregates computed from the Review table per product."""
+    rows = Review.objects.values("product_id").annotate(
+        review_count=Count("id"),
+        verified_review_count=Count("id", filter=Q(is_verified=True)),
+        rating_sum=Sum("rating"),
+        **{
+            f"rating_{stars}_count": Count("id", filter=Q(rating=stars))
+            for stars in RATINGS
+        },
+    )
+
+    aggregates = {}
+    for row in rows.order_by():
+        product_id = row.pop("product_id")
+        row["rating_average"] = row["rating_sum"] / row["review_count"]
+        aggregates[product_id] = row
+    return aggregates
+
+
+def rebuild(fix=True, batch_size=1000):
+    """
+    Compare every product's stored aggregates with the Review table.
+
+    Returns the ids of products whose stored values had drifted. When
+    `fix` is True the drifted rows are corrected with bulk updates;
+    reviews written while this runs may need a second pass.
+    """
+    aggregates = calculate_aggregates()
+    empty = {field: 0 for field in AGGREGATE_FIELDS}
+    drifted = []
+    pending = []
+
+    fields = AGGREGATE_FIELDS + ["updated_at"]
+    products = Product.objects.only("id", *fields).order_by("id")
+    for product in products.iterator(chunk_size=batch_size):
+        expected = aggregates.get(product.id, empty)
+        changed = False
+
+        for field in AGGREGATE_FIELDS:
+            value = expected[field]
+            current = getattr(product, field)
+            if field == "rating_average":
+                differs = abs(current - value) > 1e-9
+            else:
+                differs = current != value
+            if differs:
+                setattr(product, field, value)
+                changed = True
+
+        if changed:
+            product.updated_at = timezone.now()
+            drifted.append(product.id)
+            if fix:
+                pending.append(product)
+
+        if fix and len(pending) >= batch_size:
+            Product.objects.bulk_update(pending, fields)
+            pending = []
+
+    if fix and pending:
+        Product.objects.bulk_update(pending, fields)
+
+    return drifted
@@ -0,0 +1,35 @@
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+
+class RawJSON:
+    """JSON that has already been rendered, ready to send as it is."""
+
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Render JSON, passing pre-rendered RawJSON bodies straight through.
+
+    Responses served from the cache are stored already rendered, so a
+    hit costs no encoding at all; everything else renders exactly as
+    DRF's JSONRenderer would.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Return the response body as bytes."""
+        if isinstance(data, RawJSON):
+            return data.content
+        return super().render(data, accepted_media_type, renderer_context)
+
+
+def render_json(data):
+    """Render `data` to the bytes a JSON API response would contain."""
+    return RawJSON(FastJSONRenderer().render(data))
+
+
+# Renderers for read-only endpoints that serve RawJSON
+FAST_RENDERERS = [FastJSONRenderer, BrowsableAPIRenderer]
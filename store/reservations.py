@@ -0,0 +1,160 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, PositiveIntegerField, Sum, When
+from django.utils import timezone
+
+from .caching import bump_on_commit, product_scopes
+from .models import Product, StockHold
+
+
+def hold_expiry():
+    """Return the expiry time for a hold placed now."""
+    return timezone.now() + timedelta(minutes=settings.STOCK_HOLD_MINUTES)
+
+
+def reserve(cart, product, quantity):
+    """
+    Hold `quantity` units of a product for a cart.
+
+    The product's `reserved` counter is raised with a conditional UPDATE
+    that only succeeds while `stock - reserved` covers the request, so
+    two buyers can never hold the same unit. The product row is only
+    locked for this short transaction. Returns True if the hold was
+    placed or extended.
+    """
+    with transaction.atomic():
+        release_expired(product_ids=[product.id])
+
+        reserved = Product.objects.filter(
+            id=product.id,
+            stock__gte=F("reserved") + quantity,
+        ).update(reserved=F("reserved") + quantity)
+
+        if not reserved:
+            return False
+
+        bump_on_commit(*product_scopes([product]))
+
+        expires_at = hold_expiry()
+        extended = StockHold.objects.filter(
+            cart=cart,
+            product=product,
+        ).update(quantity=F("quantity") + quantity, expires_at=expires_at)
+
+        if not extended:
+            try:
+                with transaction.atomic():
+                    StockHold.objects.create(
+                        cart=cart,
+                        product=product,
+                        quantity=quantity,
+                        expires_at=expires_at,
+                    )
+            except IntegrityError:
+                StockHold.objects.filter(cart=cart, product=product).update(
+                    quantity=F("quantity") + quantity,
+                    expires_at=expires_at,
+                )
+
+    return True
+
+
+def release(holds):
+    """
+    Delete the given holds and return their units to available stock.
+
+    `holds` is a StockHold queryset. The affected products are locked
+    before the holds are read, which is the same order checkout and
+    `reserve` take their locks in. Returns the number of holds released.
+    """
+    with transaction.atomic():
+        product_ids = list(holds.values_list("product_id", flat=True))
+        if not product_ids:
+            return 0
+
+        locked = (
+            Product.objects.select_for_update()
+            .filter(id__in=product_ids)
+            .order_by("id")
+        )
+        store_ids = dict(locked.values_list("id", "store_id"))
+
+        released = defaultdict(int)
+        hold_ids = []
+        for hold_id, product_id, quantity in holds.values_list(
+            "id", "product_id", "quantity"
+        ):
+            hold_ids.append(hold_id)
+            released[product_id] += quantity
+
+        if not hold_ids:
+            return 0
+
+        bump_on_commit(
+            *[f"product:{product_id}" for product_id in released],
+            *[f"store:{store_ids[product_id]}" for product_id in released],
+        )
+
+        StockHold.objects.filter(id__in=hold_ids).delete()
+        Product.objects.filter(id__in=released).update(
+            reserved=Case(
+                *[
+                    When(id=product_id, then=F("reserved") - quantity)
+                    for product_id, quantity in released.items()
+                ],
+                output_field=PositiveIntegerField(),
+            )
+        )
+
+    return len(hold_ids)
+
+
+def release_expired(batch_size=None, product_ids=None):
+    """Release up to `batch_size` expired holds, optionally per product."""
+    holds = StockHold.objects.filter(expires_at__lte=timezone.now())
+    if product_ids is not None:
+        holds = holds.filter(product_id__in=product_ids)
+
+    if batch_size:
+        ids = list(
+            holds.order_by("expires_at").values_list("id", flat=True)[
+                :batch_size
+            ]
+        )
+        holds = StockHold.objects.filter(
+            id__in=ids,
+            expires_at__lte=timezone.now(),
+        )
+
+    return release(holds)
+
+
+def reconcile_reserved():
+    """
+    Recompute every product's `reserved` counter from its holds.
+
+    Needed only if holds were removed without going through `release`,
+    for example when a cart or user is deleted from the admin panel.
+    Returns the number of products whose counter was corrected.
+    """
+    with transaction.atomic():
+        counters = list(
+            Product.objects.select_for_update().values_list("id", "reserved")
+        )
+        held = dict(
+            StockHold.objects.values("product_id")
+            .annotate(total=Sum("quantity"))
+            .values_list("product_id", "total")
+        )
+
+        drifted = [
+            Product(id=product_id, reserved=held.get(product_id, 0))
+            for product_id, reserved in counters
+            if reserved != held.get(product_id, 0)
+        ]
+        Product.objects.bulk_update(drifted, ["reserved"], batch_size=500)
+
+    return len(drifted)
@@ -0,0 +1,351 @@
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    F,
+    FloatField,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+
+from .browse import parse_price
+from .db import upsert_options
+from .models import Product, SearchDocument, SearchPosting
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has in is it of on or the to with"
+    .split()
+)
+
+# Each occurrence in these fields counts this many times towards a term's
+# frequency, so a match in the product name outranks one in the text
+FIELD_WEIGHTS = (("name", 3), ("description", 1), ("store_name", 2))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """Split text into lower-case search terms without stop words."""
+    return [
+        token[:64]
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def build_document(product, store_name):
+    """Return (term frequencies, length) for one product."""
+    frequencies = Counter()
+    fields = {
+        "name": product.name,
+        "description": product.description,
+        "store_name": store_name,
+    }
+    for field, weight in FIELD_WEIGHTS:
+        for term in tokenize(fields[field] or ""):
+            frequencies[term] += weight
+    return frequencies, sum(frequencies.values())
+
+
+def term_impact(frequency, length, average_length):
+    """Return the BM25 weight of a term, before multiplying by its idf."""
+    length_norm = K1 * (1 - B + B * length / (average_length or length or 1))
+    return frequency * (K1 + 1) / (frequency + length_norm)
+
+
+def index_products(products):
+    """
+    Replace the index entries of the given products.
+
+    The old postings are deleted with one query and the new ones are
+    written with bulk inserts, so indexing a batch costs the same
+    handful of queries as indexing one product.
+    """
+    products = list(products)
+    if not products:
+        return
+
+    store_names = dict(
+        Product.objects.filter(id__in=[p.id for p in products]).values_list(
+            "id", "store__name"
+        )
+    )
+    _, average_length = corpus_stats()
+    documents = []
+    postings = []
+
+    for product in products:
+        frequencies, length = build_document(
+            product,
+            store_names.get(product.id, ""),
+        )
+        documents.append(SearchDocument(product=product, length=length))
+        postings.extend(
+            SearchPosting(
+                term=term,
+                product=product,
+                frequency=frequency,
+                document_length=length,
+                impact=term_impact(frequency, length, average_length),
+            )
+            for term, frequency in frequencies.items()
+        )
+
+    with transaction.atomic():
+        SearchPosting.objects.filter(product__in=products).delete()
+        SearchDocument.objects.bulk_create(
+            documents,
+            **upsert_options(["product"], ["length"]),
+        )
+        SearchPosting.objects.bulk_create(postings, batch_size=1000)
+
+
+def impact_expression(average_length):
+    """Return term_impact() as an expression over a posting's columns."""
+    frequency = Cast(F("frequency"), FloatField())
+    length = Cast(F("document_length"), FloatField())
+    return (
+        frequency
+        * Value(K1 + 1)
+        / (
+            frequency
+            + Value(K1 * (1 - B))
+            + Value(K1 * B / (average_length or 1)) * length
+        )
+    )
+
+
+def refresh_impacts():
+    """
+    Recompute every posting's impact from the current average length.
+
+    Impacts are computed with the average at the time a product was
+    indexed, so they drift as the catalog changes; this brings them in
+    line again with a single UPDATE.
+    """
+    cache.delete("search:corpus")
+    _, average_length = corpus_stats()
+    return SearchPosting.objects.update(
+        impact=impact_expression(average_length)
+    )
+
+
+def rebuild_index(batch_size=1000, products=None):
+    """
+    Index every product (or those in `products`) again, in batches.
+
+    A full rebuild also refreshes the impact of every posting.
+    """
+    total = 0
+    full = products is None
+    if full:
+        products = Product.objects.all()
+    products = products.only("id", "name", "description").order_by("id")
+    batch = []
+    for product in products.iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            index_products(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        index_products(batch)
+        total += len(batch)
+
+    if full:
+        refresh_impacts()
+    else:
+        cache.delete("search:corpus")
+    return total
+
+
+def reindex_store(store_id):
+    """Index the products of one store again, after it was renamed."""
+    return rebuild_index(products=Product.objects.filter(store_id=store_id))
+
+
+def corpus_stats():
+    """Return (document count, average length), cached briefly."""
+    stats = cache.get("search:corpus")
+    if stats is None:
+        row = SearchDocument.objects.aggregate(
+            count=Count("product_id"),
+            average=Avg("length"),
+        )
+        stats = (row["count"], row["average"] or 0)
+        cache.set("search:corpus", stats, settings.SEARCH_STATS_TIMEOUT)
+    return stats
+
+
+def document_frequencies(terms):
+    """Return how many products contain each term, cached briefly."""
+    keys = {f"search:df:{term}": term for term in terms}
+    cached = cache.get_many(keys)
+    frequencies = {keys[key]: value for key, value in cached.items()}
+
+    missing = [term for term in terms if term not in frequencies]
+    if missing:
+        counted = dict(
+            SearchPosting.objects.filter(term__in=missing)
+            .values("term")
+            .annotate(df=Count("id"))
+            .values_list("term", "df")
+        )
+        fresh = {term: counted.get(term, 0) for term in missing}
+        cache.set_many(
+            {f"search:df:{term}": df for term, df in fresh.items()},
+            settings.SEARCH_STATS_TIMEOUT,
+        )
+        frequencies.update(fresh)
+
+    return frequencies
+
+
+def search(query, offset=0, limit=20, in_stock=False, min_price=None,
+           max_price=None):
+    """
+    Rank products against `query` with BM25.
+
+    Candidates are the SEARCH_TERM_DEPTH postings of each query term
+    with the highest impact, each read with a short scan of the
+    (term, impact) index, so common terms cost the same as rare ones.
+    The exact score of the candidates is then computed in one grouped
+    query. A product outside every term's top postings can only rank
+    above the candidates by scoring moderately on several terms at
+    once, which is the accuracy traded for not reading every posting.
+    Terms that occur in more than SEARCH_MAX_DF_RATIO of all products
+    are also dropped whenever a rarer term is present.
+    Returns a list of (product id, score) pairs, best first, with up to
+    `limit` + 1 entries so callers can tell whether more exist.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    count, average_length = corpus_stats()
+    if not count:
+        return []
+
+    frequencies = document_frequencies(terms)
+    terms = [term for term in terms if frequencies[term]]
+    rare = [
+        term
+        for term in terms
+        if frequencies[term] <= count * settings.SEARCH_MAX_DF_RATIO
+    ]
+    terms = rare or terms
+    if not terms:
+        return []
+
+    idf = Case(
+        *[
+            When(
+                term=term,
+                then=Value(
+                    math.log(
+                        1
+                        + (count - frequencies[term] + 0.5)
+                        / (frequencies[term] + 0.5)
+                    )
+                ),
+            )
+            for term in terms
+        ],
+        output_field=FloatField(),
+    )
+
+    postings = SearchPosting.objects.all()
+    if in_stock:
+        postings = postings.filter(product__stock__gt=F("product__reserved"))
+    if min_price is not None:
+        postings = postings.filter(product__price__gte=min_price)
+    if max_price is not None:
+        postings = postings.filter(product__price__lte=max_price)
+
+    depth = max(settings.SEARCH_TERM_DEPTH, offset + limit + 1)
+    candidates = set()
+    for term in terms:
+        candidates.update(
+            postings.filter(term=term)
+            .order_by("-impact")
+            .values_list("product_id", flat=True)[:depth]
+        )
+    if not candidates:
+        return []
+
+    ranked = (
+        SearchPosting.objects.filter(term__in=terms, product__in=candidates)
+        .values("product_id")
+        .annotate(
+            score=Sum(
+                idf * impact_expression(average_length),
+                output_field=FloatField(),
+            )
+        )
+        .order_by("-score", "product_id")
+    )
+    return list(
+        ranked.values_list("product_id", "score")[offset:offset + limit + 1]
+    )
+
+
+def parse_params(params):
+    """
+    Read the search options from a request's query parameters.
+
+    Raises ValueError for a malformed page number or price.
+    """
+    page = int(params.get("page") or 1)
+    if page < 1 or page > settings.SEARCH_MAX_PAGE:
+        raise ValueError("page out of range")
+
+    return {
+        "query": params.get("q", "").strip(),
+        "page": page,
+        "in_stock": params.get("in_stock") in ("1", "true", "on"),
+        "min_price": parse_price(params.get("min_price"), "min_price"),
+        "max_price": parse_price(params.get("max_price"), "max_price"),
+    }
+
+
+def run_search(options, page_size):
+    """
+    Return (products, has_next) for parsed search options.
+
+    Each product gets a `score` attribute, and the products keep the
+    ranking order.
+    """
+    ranked = search(
+        options["query"],
+        offset=(options["page"] - 1) * page_size,
+        limit=page_size,
+        in_stock=options["in_stock"],
+        min_price=options["min_price"],
+        max_price=options["max_price"],
+    )
+    has_next = len(ranked) > page_size
+    ranked = ranked[:page_size]
+
+    products = Product.objects.select_related("store").in_bulk(
+        [product_id for product_id, _ in ranked]
+    )
+    results = []
+    for product_id, score in ranked:
+        product = products.get(product_id)
+        if product is not None:
+            product.score = score
+            results.append(product)
+
+    return results, has_next
@@ -0,0 +1,337 @@
+import math
+import random
+from array import array
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+
+from accounts.apps import setup_permissions
+from accounts.models import UserProfile
+from .models import Store, Product, Order, OrderItem, Review
+
+ADJECTIVES = (
+    "Classic Compact Deluxe Eco Essential Handmade Heavy-Duty Lightweight "
+    "Modern Organic Portable Premium Rustic Smart Vintage Wireless"
+).split()
+NOUNS = (
+    "Backpack Blender Candle Chair Jacket Kettle Lamp Mug Notebook Pillow "
+    "Planter Scarf Sneakers Speaker Teapot Wallet Watch"
+).split()
+STORE_WORDS = (
+    "Acme Atlas Birch Cedar Harbor Lantern Maple Meadow Nova Orchard "
+    "Pioneer Summit Willow"
+).split()
+COMMENTS = [
+    "Terrible, would not buy again.",
+    "Not great, had some problems.",
+    "Does the job.",
+    "Very happy with it.",
+    "Excellent, exactly as described!",
+]
+# Relative frequency of one to five star ratings, as cumulative weights
+STARS = range(1, 6)
+STAR_WEIGHTS = list(accumulate([5, 7, 13, 30, 45]))
+
+
+def zipf_index(rng, n, skew):
+    """
+    Return a random index below `n`, where index i has weight 1/(i+1)^skew.
+
+    Uses the inverse of the continuous power law's distribution, so it
+    costs O(1) per draw whatever `n` is. Small indexes are the popular
+    ones.
+    """
+    u = rng.random()
+    if abs(skew - 1) < 1e-9:
+        x = (n + 1) ** u
+    else:
+        a = 1 - skew
+        x = (1 + u * ((n + 1) ** a - 1)) ** (1 / a)
+    return min(int(x) - 1, n - 1)
+
+
+def zipf_total(n, skew):
+    """Approximate the sum of 1/(i+1)^skew for i below `n`."""
+    if abs(skew - 1) < 1e-9:
+        return math.log((n + 0.5) / 0.5)
+    a = 1 - skew
+    return ((n + 0.5) ** a - 0.5 ** a) / a
+
+
+def next_id(model):
+    """Return the first primary key above every existing row of `model`."""
+    return (model.objects.aggregate(top=Max("id"))["top"] or 0) + 1
+
+
+class MarketplaceSeeder:
+    """
+    Generate a synthetic marketplace with skewed, realistic shapes.
+
+    Stores are spread over vendors, products over stores, and reviews
+    and order lines over products with Zipf weights, so a few vendors
+    and products are huge and most are in the long tail. Everything is
+    drawn from one random.Random(seed), so the same options always give
+    the same data.
+
+    Rows are written with bulk_create in chunks, each in its own
+    transaction, with primary keys assigned here so that no chunk needs
+    to be read back. Product rating aggregates are computed as reviews
+    are generated. Nothing else must write to these tables meanwhile.
+    """
+
+    def __init__(self, seed=0, skew=1.1, chunk_size=5000, prefix="seed",
+                 password="seedpass123", verified_ratio=0.7, log=None):
+        self.rng = random.Random(seed)
+        self.skew = skew
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.password = password
+        self.verified_ratio = verified_ratio
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def write(self, model, rows):
+        """Insert a chunk of rows in one transaction."""
+        if not rows:
+            return
+        with transaction.atomic():
+            model.objects.bulk_create(rows, batch_size=self.chunk_size)
+        name = model._meta.verbose_name_plural
+        self.counts[name] = self.counts.get(name, 0) + len(rows)
+
+    def create_users(self, count, account_type):
+        """Create users with profiles and groups; return their id range."""
+        group = Group.objects.get(name=account_type)
+        memberships = User.groups.through
+        first = next_id(User)
+
+        for start in range(0, count, self.chunk_size):
+            end = min(count, start + self.chunk_size)
+            ids = range(first + start, first + end)
+            users = [
+                User(
+                    id=user_id,
+                    username=f"{self.prefix}_{account_type}_{user_id}",
+                    email=f"{self.prefix}_{account_type}_{user_id}"
+                    "@example.com",
+                    password=self.password_hash,
+                )
+                for user_id in ids
+            ]
+            self.write(User, users)
+            self.write(
+                UserProfile,
+                [
+                    UserProfile(user_id=user_id, account_type=account_type)
+                    for user_id in ids
+                ],
+            )
+            self.write(
+                memberships,
+                [
+                    memberships(user_id=user_id, group_id=group.id)
+                    for user_id in ids
+                ],
+            )
+
+        self.log(f"Created {count} {account_type}s")
+        return range(first, first + count)
+
+    def create_stores(self, count, vendors):
+        """Create stores spread over vendors; return their id range."""
+        first = next_id(Store)
+        rows = []
+
+        for store_id in range(first, first + count):
+            vendor = vendors[zipf_index(self.rng, len(vendors), self.skew)]
+            rows.append(
+                Store(
+                    id=store_id,
+                    owner_id=vendor,
+                    name=" ".join(self.rng.sample(STORE_WORDS, 2)) + " Store",
+                    description="A synthetic store for load testing.",
+                )
+            )
+            if len(rows) >= self.chunk_size:
+                self.write(Store, rows)
+                rows = []
+        self.write(Store, rows)
+
+        self.log(f"Created {count} stores")
+        return range(first, first + count)
+
+    def create_products(self, count, stores, buyers, reviews):
+        """
+        Create products with their reviews; return the product ids.
+
+        About `reviews` reviews are spread over the products with Zipf
+        weights, each by a different buyer, and each verified review
+        comes with the buyer's order of that product.
+        """
+        first = next_id(Product)
+        total_weight = zipf_total(count, self.skew)
+        self.prices = array("I")
+        rows = []
+
+        for rank in range(count):
+            product_id = first + rank
+            cents = int(math.exp(self.rng.gauss(7.5, 1.0)))
+            cents = max(99, min(cents, 99999999))
+            self.prices.append(cents)
+            product = Product(
+                id=product_id,
+                store_id=stores[zipf_index(self.rng, len(stores), self.skew)],
+                sku=f"{self.prefix.upper()}-{product_id}",
+                name=f"{self.rng.choice(ADJECTIVES)} "
+                f"{self.rng.choice(NOUNS)}",
+                description="A synthetic product for load testing.",
+                price=Decimal(cents) / 100,
+                stock=0 if self.rng.random() < 0.1 else self.rng.randint(
+                    1, 500
+                ),
+            )
+
+            expected = reviews * (rank + 1) ** -self.skew / total_weight
+            review_count = min(
+                int(expected + self.rng.random()),
+                len(buyers),
+            )
+            if review_count:
+                self.add_reviews(product, buyers, review_count)
+            rows.append(product)
+
+            if len(rows) >= self.chunk_size:
+                self.flush_products(rows)
+                rows = []
+        self.flush_products(rows)
+
+        self.log(f"Created {count} products")
+        return range(first, first + count)
+
+    def add_reviews(self, product, buyers, count):
+        """Generate a product's reviews and set its rating aggregates."""
+        stars_counts = [0] * 5
+        verified = 0
+
+        for index in self.rng.sample(range(len(buyers)), count):
+            stars = self.rng.choices(STARS, cum_weights=STAR_WEIGHTS)[0]
+            stars_counts[stars - 1] += 1
+            is_verified = self.rng.random() < self.verified_ratio
+            if is_verified:
+                verified += 1
+                self.add_order(buyers[index], [(product.id, 1)])
+            self.pending_reviews.append(
+                Review(
+                    product_id=product.id,
+                    reviewer_id=buyers[index],
+                    rating=stars,
+                    comment=COMMENTS[stars - 1],
+                    is_verified=is_verified,
+                )
+            )
+
+        rating_sum = sum(
+            stars * number for stars, number in enumerate(stars_counts, 1)
+        )
+        product.review_count = count
+        product.verified_review_count = verified
+        product.rating_sum = rating_sum
+        product.rating_average = rating_sum / count
+        for stars, number in enumerate(stars_counts, 1):
+            setattr(product, f"rating_{stars}_count", number)
+
+    def add_order(self, buyer, lines):
+        """Queue an order of (product id, quantity) lines for a buyer."""
+        order_id = self.next_order_id
+        self.next_order_id += 1
+        total = 0
+
+        for product_id, quantity in lines:
+            cents = self.prices[product_id - self.first_product]
+            total += cents * quantity
+            self.pending_items.append(
+                OrderItem(
+                    order_id=order_id,
+                    product_id=product_id,
+                    quantity=quantity,
+                    price_at_purchase=Decimal(cents) / 100,
+                )
+            )
+        self.pending_orders.append(
+            Order(
+                id=order_id,
+                buyer_id=buyer,
+                total_price=Decimal(total) / 100,
+            )
+        )
+
+    def flush_products(self, products):
+        """Write a chunk of products and everything queued for them."""
+        self.write(Product, products)
+        self.flush_orders()
+        self.write(Review, self.pending_reviews)
+        self.pending_reviews = []
+
+    def flush_orders(self):
+        """Write the queued orders and their lines."""
+        self.write(Order, self.pending_orders)
+        self.write(OrderItem, self.pending_items)
+        self.pending_orders = []
+        self.pending_items = []
+
+    def create_orders(self, count, buyers, products):
+        """Create orders of one to four long-tail products each."""
+        for _ in range(count):
+            lines = {}
+            for _ in range(self.rng.randint(1, 4)):
+                rank = zipf_index(self.rng, len(products), self.skew)
+                lines[products[rank]] = self.rng.randint(1, 3)
+            self.add_order(self.rng.choice(buyers), lines.items())
+            if len(self.pending_orders) >= self.chunk_size:
+                self.flush_orders()
+        self.flush_orders()
+        self.log(f"Created {count} more orders")
+
+    def reset_sequences(self):
+        """Move id sequences past the assigned keys, where there are any."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(),
+            [User, Store, Product, Order],
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def run(self, vendors, buyers, stores, products, orders, reviews):
+        """Generate the whole marketplace and return rows per table."""
+        if User.objects.filter(
+            username__startswith=f"{self.prefix}_"
+        ).exists():
+            raise ValueError(
+                f"Users prefixed {self.prefix}_ already exist; pick "
+                f"another prefix"
+            )
+
+        setup_permissions(None)
+        # Hashing once keeps the password hasher out of the loop
+        self.password_hash = make_password(self.password)
+        self.pending_reviews = []
+        self.pending_orders = []
+        self.pending_items = []
+        self.next_order_id = next_id(Order)
+        self.first_product = next_id(Product)
+
+        vendor_ids = self.create_users(vendors, "vendor")
+        buyer_ids = self.create_users(buyers, "buyer")
+        store_ids = self.create_stores(stores, vendor_ids)
+        product_ids = self.create_products(
+            products, store_ids, buyer_ids, reviews
+        )
+        self.create_orders(orders, buyer_ids, product_ids)
+        self.reset_sequences()
+        return self.counts
@@ -1,29 +1,112 @@
+from django.contrib.auth.models import User
 from rest_framework import serializers
 from .models import Store, Product, Review
 
 
-class StoreSerializer(serializers.ModelSerializer):
+def parse_fieldset(params, serializer_class):
+    """
+    Read ?fields= and ?expand= for a serializer from query parameters.
+
+    Returns (fields, expand) as sorted tuples, fields being None when
+    every field was asked for. Raises ValueError for unknown names.
+    """
+    def names(param):
+        value = params.get(param, '')
+        return sorted({name.strip() for name in value.split(',')} - {''})
+
+    meta = serializer_class.Meta
+    expandable = getattr(meta, 'expandable_fields', {})
+
+    fields = names('fields')
+    unknown = set(fields) - set(meta.fields)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    expand = names('expand')
+    unknown = set(expand) - set(expandable)
+    if unknown:
+        raise ValueError(
+            f"Cannot expand: {', '.join(sorted(unknown))}"
+        )
+
+    return tuple(fields) or None, tuple(expand)
+
+
+class FieldsetMixin:
+    """
+    Let a serializer return only some fields and embed related objects.
+
+    Pass `fields` to keep only those fields, and `expand` to replace
+    foreign key ids listed in Meta.expandable_fields with the related
+    object, serialised by the given serializer. Expanded fields are
+    always included. The queryset should select_related() them.
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand:
+            self.fields[name] = expandable[name](read_only=True)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(expand):
+                self.fields.pop(name)
+
+
+class UserSerializer(serializers.ModelSerializer):
+    """Translate a store owner or reviewer into JSON."""
+
+    class Meta:
+        model = User
+        fields = ['id', 'username']
+
+
+class StoreSerializer(FieldsetMixin, serializers.ModelSerializer):
     """Translate Store objects into JSON and back."""
 
     class Meta:
         model = Store
         fields = ['id', 'owner', 'name', 'description']
         # 'id' is included so the API user knows which store is which
-        # 'owner' is the vendor's user ID
+        # 'owner' is the vendor's user ID, or the vendor with ?expand=
+        expandable_fields = {'owner': UserSerializer}
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(FieldsetMixin, serializers.ModelSerializer):
     """Translate Product objects into JSON and back."""
 
     class Meta:
         model = Product
         fields = [
-            'id', 'store', 'name',
-            'description', 'price', 'stock'
+            'id', 'store', 'sku', 'name',
+            'description', 'price', 'stock',
+            'review_count', 'rating_average', 'updated_at'
         ]
+        # rating aggregates and timestamps are maintained by the server
+        read_only_fields = ['review_count', 'rating_average', 'updated_at']
+        expandable_fields = {'store': StoreSerializer}
+
+    def validate_sku(self, value):
+        """Store a blank SKU as no SKU, so it never clashes."""
+        return value or None
+
+
+class ProductImportSerializer(ProductSerializer):
+    """Validate one row of a bulk product import."""
+
+    class Meta(ProductSerializer.Meta):
+        # the store comes from the URL, and rows are matched on SKU, so
+        # an existing SKU is an update rather than a uniqueness error
+        fields = ['sku', 'name', 'description', 'price', 'stock']
+        validators = []
+        extra_kwargs = {
+            'sku': {'required': True, 'allow_blank': False,
+                    'allow_null': False},
+        }
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(FieldsetMixin, serializers.ModelSerializer):
     """Translate Review objects into JSON and back."""
 
     class Meta:
@@ -34,3 +117,4 @@ class ReviewSerializer(serializers.ModelSerializer):
         ]
         # read_only_fields means the API user can't manually set these
         read_only_fields = ['reviewer', 'is_verified', 'created_at']
+        expandable_fields = {'reviewer': UserSerializer}
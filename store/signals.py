@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .caching import bump_on_commit
+from .models import Store, Product, Review
+from .search import index_products, reindex_store
+
+
+@receiver([post_save, post_delete], sender=Store)
+def store_changed(sender, instance, **kwargs):
+    """Invalidate cached pages that show the store."""
+    bump_on_commit(
+        "stores",
+        f"vendor:{instance.owner_id}",
+        f"store:{instance.id}",
+    )
+
+
+@receiver(pre_save, sender=Store)
+def store_renaming(sender, instance, **kwargs):
+    """Note whether a saved store changes name, for the search index."""
+    instance._search_stale = bool(
+        instance.pk
+        and Store.objects.filter(pk=instance.pk)
+        .exclude(name=instance.name)
+        .exists()
+    )
+
+
+@receiver(post_save, sender=Store)
+def store_saved(sender, instance, **kwargs):
+    """Reindex the store's products when its name has changed."""
+    if getattr(instance, "_search_stale", False):
+        transaction.on_commit(lambda: reindex_store(instance.id))
+
+
+@receiver([post_save, post_delete], sender=Product)
+def product_changed(sender, instance, **kwargs):
+    """Invalidate cached pages that show the product."""
+    bump_on_commit(f"store:{instance.store_id}", f"product:{instance.id}")
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    """Index the saved product once the transaction commits."""
+    transaction.on_commit(lambda: index_products([instance]))
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_changed(sender, instance, origin=None, **kwargs):
+    """Invalidate cached pages that show the review or its rating."""
+    if isinstance(origin, (Store, Product)):
+        # Deleted along with its product, which bumps the same scopes
+        return
+
+    if Review.product.is_cached(instance):
+        store_id = instance.product.store_id
+    else:
+        store_id = (
+            Product.objects.filter(id=instance.product_id)
+            .values_list("store_id", flat=True)
+            .first()
+        )
+    bump_on_commit(f"store:{store_id}", f"product:{instance.product_id}")
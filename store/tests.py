@@ -1,3 +1,490 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import UserProfile
+from accounts.reset_tokens import issue_reset_token
+from accounts.tokens import create_token
+from .browse import SORTS
+from .cart import purge_abandoned
+from .reservations import release_expired, reserve
+from .search import rebuild_index, search
+from .imports import import_products
+from .pagination import (
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+from .models import (
+    Store,
+    Product,
+    Order,
+    OrderItem,
+    Review,
+    Cart,
+    CartItem,
+    StockHold,
+    IdempotencyKey,
+)
+
+
+def make_user(username, account_type):
+    """Create a user with the profile and group of `account_type`."""
+    user = User.objects.create_user(
+        username, f"{username}@example.com", "pass12345"
+    )
+    UserProfile.objects.create(user=user, account_type=account_type)
+    user.groups.add(Group.objects.get(name=account_type))
+    return user
+
+
+class StoreTestCase(TestCase):
+    """Give each test a vendor with a store, and a logged in buyer."""
+
+    def setUp(self):
+        # Cached roles and catalog pages are keyed by ids the test
+        # database hands out again
+        cache.clear()
+        self.vendor = make_user("vendor", "vendor")
+        self.buyer = make_user("buyer", "buyer")
+        self.store = Store.objects.create(
+            owner=self.vendor, name="Shop", description="A shop"
+        )
+        self.client.force_login(self.buyer)
+
+    def make_products(self, count, **fields):
+        """Create `count` products in the test store."""
+        fields = {"price": "10.00", "stock": 50, **fields}
+        return [
+            Product.objects.create(
+                store=self.store, name=f"Product {i}", **fields
+            )
+            for i in range(count)
+        ]
+
+
+class CheckoutQueryCountTests(StoreTestCase):
+    """Checkout runs the same queries however many lines the cart has."""
+
+    # Session, cart, holds, products, order, lines, invoice and cleanup
+    QUERIES = 23
+
+    def check_out(self, lines):
+        """Fill the cart with `lines` products, then check out."""
+        products = self.make_products(lines)
+        for product in products:
+            self.client.post(
+                reverse("add_to_cart", args=[product.id]), {"quantity": 2}
+            )
+
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.post(reverse("checkout"))
+
+        self.assertRedirects(
+            response, reverse("store_list"), fetch_redirect_response=False
+        )
+        order = Order.objects.get(buyer=self.buyer)
+        self.assertEqual(
+            OrderItem.objects.filter(order=order).count(), lines
+        )
+        for product in products:
+            product.refresh_from_db()
+            self.assertEqual((product.stock, product.reserved), (48, 0))
+
+    def test_one_line(self):
+        self.check_out(1)
+
+    def test_three_lines(self):
+        self.check_out(3)
+
+    def test_ten_lines(self):
+        self.check_out(10)
+
+
+class ReservationTests(StoreTestCase):
+    """Holds keep carts from overselling and are given back on expiry."""
+
+    def test_second_cart_cannot_reserve_last_unit(self):
+        product = self.make_products(1, stock=1)[0]
+        first = Cart.objects.create(user=self.buyer)
+        second = Cart.objects.create(user=self.vendor)
+
+        self.assertTrue(reserve(first, product, 1))
+        self.assertFalse(reserve(second, product, 1))
+
+        product.refresh_from_db()
+        self.assertEqual(product.reserved, 1)
+        self.assertFalse(StockHold.objects.filter(cart=second).exists())
+
+    def test_release_expired(self):
+        product = self.make_products(1)[0]
+        cart = Cart.objects.create(user=self.buyer)
+        reserve(cart, product, 3)
+        StockHold.objects.update(expires_at=timezone.now())
+
+        self.assertEqual(release_expired(), 1)
+
+        product.refresh_from_db()
+        self.assertEqual(product.reserved, 0)
+        self.assertFalse(StockHold.objects.exists())
+
+    def test_checkout_takes_stock_and_reservation(self):
+        product = self.make_products(1, stock=5)[0]
+        self.client.post(
+            reverse("add_to_cart", args=[product.id]), {"quantity": 2}
+        )
+        product.refresh_from_db()
+        self.assertEqual(product.reserved, 2)
+
+        self.client.post(reverse("checkout"))
+
+        product.refresh_from_db()
+        self.assertEqual((product.stock, product.reserved), (3, 0))
+
+    def test_vendor_edit_keeps_reserved(self):
+        product = self.make_products(1)[0]
+        self.client.post(
+            reverse("add_to_cart", args=[product.id]), {"quantity": 2}
+        )
+
+        self.client.force_login(self.vendor)
+        self.client.post(
+            reverse("edit_product", args=[product.id]),
+            {"name": "Renamed", "description": "", "price": "9.00",
+             "stock": 40},
+        )
+
+        product.refresh_from_db()
+        self.assertEqual((product.name, product.stock), ("Renamed", 40))
+        self.assertEqual(product.reserved, 2)
+
+
+class IdempotencyTests(StoreTestCase):
+    """Repeating a request with the same key never runs it twice."""
+
+    def check_out(self, key, **data):
+        """Post the checkout form with `key` in its hidden field."""
+        return self.client.post(
+            reverse("checkout"), {"idempotency_key": key, **data}
+        )
+
+    def test_replay_creates_one_order(self):
+        product = self.make_products(1)[0]
+        self.client.post(
+            reverse("add_to_cart", args=[product.id]), {"quantity": 2}
+        )
+
+        first = self.check_out("key-1")
+        second = self.check_out("key-1")
+
+        self.assertNotIn("Idempotent-Replayed", first)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.status_code, first.status_code)
+        self.assertEqual(second["Location"], first["Location"])
+        self.assertEqual(Order.objects.filter(buyer=self.buyer).count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 48)
+
+    def test_in_flight_key_conflicts(self):
+        self.check_out("key-1")
+        IdempotencyKey.objects.update(status_code=None)
+
+        response = self.check_out("key-1")
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_different_payload_is_rejected(self):
+        _, key = create_token(self.vendor, "api", ["stores:write"])
+        headers = {
+            "HTTP_AUTHORIZATION": f"Token {key}",
+            "HTTP_IDEMPOTENCY_KEY": "key-1",
+        }
+        url = reverse("api_create_store")
+
+        first = self.client.post(
+            url, {"name": "One", "description": "d"}, **headers
+        )
+        second = self.client.post(
+            url, {"name": "Two", "description": "d"}, **headers
+        )
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 422)
+        self.assertFalse(Store.objects.filter(name="Two").exists())
+
+
+class PurgeCartTests(StoreTestCase):
+    """Carts untouched for CART_TTL_DAYS are deleted with their holds."""
+
+    def test_purge_abandoned(self):
+        product = self.make_products(1)[0]
+        for _ in range(2):
+            self.client.post(
+                reverse("add_to_cart", args=[product.id]), {"quantity": 2}
+            )
+        abandoned = Cart.objects.get(user=self.buyer)
+        Cart.objects.filter(id=abandoned.id).update(
+            updated_at=timezone.now() - timedelta(days=15)
+        )
+        fresh = Cart.objects.create(user=self.vendor)
+
+        self.assertEqual(purge_abandoned(batch_size=1), 1)
+
+        self.assertFalse(Cart.objects.filter(id=abandoned.id).exists())
+        self.assertTrue(Cart.objects.filter(id=fresh.id).exists())
+        self.assertFalse(StockHold.objects.exists())
+        product.refresh_from_db()
+        self.assertEqual(product.reserved, 0)
+
+
+class PaginationTests(StoreTestCase):
+    """Cursors walk every sort order without skipping or repeating rows."""
+
+    PAGE_SIZE = 3
+
+    def setUp(self):
+        super().setUp()
+        # Few distinct values, so every sort has ties for the id to break
+        created_at = timezone.now()
+        for i, product in enumerate(self.make_products(10)):
+            Product.objects.filter(id=product.id).update(
+                price=("5.00", "10.00")[i % 2],
+                created_at=created_at,
+                review_count=i % 3,
+                rating_average=("4.00", "2.00")[i % 2],
+            )
+        self.products = Product.objects.filter(store=self.store)
+
+    def walk(self, ordering, page, direction):
+        """Follow `direction` cursors from `page` and return all ids."""
+        ids = []
+        while page is not None:
+            if direction == "next":
+                ids += [product.id for product in page]
+            else:
+                ids = [product.id for product in page] + ids
+            cursor = getattr(page, f"{direction}_cursor")
+            page = cursor and paginate(
+                self.products, ordering, cursor, self.PAGE_SIZE
+            )
+        return ids
+
+    def test_every_sort_both_ways(self):
+        for sort, ordering in SORTS.items():
+            with self.subTest(sort=sort):
+                expected = list(
+                    self.products.order_by(*ordering).values_list(
+                        "id", flat=True
+                    )
+                )
+                first = paginate(
+                    self.products, ordering, page_size=self.PAGE_SIZE
+                )
+                self.assertEqual(self.walk(ordering, first, "next"), expected)
+
+                last = paginate(
+                    self.products,
+                    ordering,
+                    encode_cursor(
+                        self.products.order_by(*ordering)[len(expected) - 2],
+                        ordering,
+                        "next",
+                    ),
+                    self.PAGE_SIZE,
+                )
+                self.assertEqual(
+                    self.walk(ordering, last, "previous"), expected
+                )
+
+    def test_cursor_round_trip(self):
+        ordering = SORTS["price"]
+        product = self.products.order_by(*ordering)[4]
+
+        cursor = encode_cursor(product, ordering, "previous")
+
+        self.assertEqual(
+            decode_cursor(cursor, self.products, ordering),
+            ("previous", [product.price, product.id]),
+        )
+
+    def test_tampered_cursor_is_rejected(self):
+        ordering = SORTS["price"]
+        cursor = encode_cursor(self.products.first(), ordering, "next")
+        tampered = ("A" if cursor[0] != "A" else "B") + cursor[1:]
+
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(tampered, self.products, ordering)
+        response = self.client.get(
+            reverse("product_list", args=[self.store.id]),
+            {"cursor": tampered},
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class SearchTests(StoreTestCase):
+    """Search ranks from each term's highest-impact postings."""
+
+    def setUp(self):
+        super().setUp()
+        self.products = [
+            Product.objects.create(
+                store=self.store, name=name, description=description,
+                price="10.00", stock=1,
+            )
+            for name, description in [
+                ("Teapot", "Blue"),
+                ("Blue teapot", "Blue teapot, teapot lid"),
+                ("Kettle", "Not a teapot"),
+            ]
+        ]
+        rebuild_index()
+
+    def test_best_match_first(self):
+        ranked = [product_id for product_id, _ in search("blue teapot")]
+
+        self.assertEqual(ranked[0], self.products[1].id)
+        self.assertEqual(set(ranked), {p.id for p in self.products})
+
+    def test_term_depth_keeps_top_postings(self):
+        best = search("teapot")[0]
+
+        with self.settings(SEARCH_TERM_DEPTH=1):
+            self.assertEqual(search("teapot", limit=0), [best])
+
+
+class ImportTests(StoreTestCase):
+    """Re-importing a SKU only changes the columns the file supplies."""
+
+    def setUp(self):
+        super().setUp()
+        self.product = Product.objects.create(
+            store=self.store,
+            sku="SKU-1",
+            name="Old name",
+            description="Kept description",
+            price="1.00",
+            stock=1,
+        )
+
+    def test_update_without_description_keeps_it(self):
+        report = import_products(
+            self.store,
+            [(1, {"sku": "SKU-1", "name": "New name", "price": "5.00",
+                  "stock": 7})],
+        )
+
+        self.assertEqual(report["updated"], 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.name, "New name")
+        self.assertEqual(self.product.stock, 7)
+        self.assertEqual(self.product.description, "Kept description")
+
+    def test_mixed_columns_in_one_chunk(self):
+        report = import_products(
+            self.store,
+            [
+                (1, {"sku": "SKU-1", "name": "Renamed", "price": "2.00",
+                     "stock": 4, "description": "New description"}),
+                (2, {"sku": "SKU-2", "name": "Added", "price": "3.00",
+                     "stock": 2}),
+            ],
+        )
+
+        self.assertEqual((report["created"], report["updated"]), (1, 1))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.description, "New description")
+        added = Product.objects.get(store=self.store, sku="SKU-2")
+        self.assertEqual((added.name, added.description), ("Added", ""))
+
+    def test_duplicate_sku_is_rejected(self):
+        report = import_products(
+            self.store,
+            [
+                (1, {"sku": "SKU-2", "name": "First", "price": "2.00",
+                     "stock": 4}),
+                (2, {"sku": "SKU-3", "name": "Other", "price": "2.00",
+                     "stock": 4}),
+                (3, {"sku": "SKU-2", "name": "Second", "price": "3.00",
+                     "stock": 5}),
+            ],
+            chunk_size=2,
+        )
+
+        self.assertEqual((report["created"], report["failed"]), (2, 1))
+        self.assertEqual(
+            report["errors"],
+            [{"line": 3,
+              "errors": {"sku": ["Duplicate SKU, first seen on line 1."]}}],
+        )
+        added = Product.objects.get(store=self.store, sku="SKU-2")
+        self.assertEqual(added.name, "First")
+
+
+@override_settings(NPLUSONE_DETECTION=True, NPLUSONE_ACTION="raise")
+class NPlusOneTests(StoreTestCase):
+    """The busiest pages load related rows without a query per row."""
+
+    ROWS = 10
+
+    def setUp(self):
+        super().setUp()
+        self.products = self.make_products(self.ROWS)
+        self.product = self.products[0]
+        buyers = [make_user(f"buyer{i}", "buyer") for i in range(self.ROWS)]
+
+        for buyer, product in zip(buyers, self.products):
+            Review.objects.create(
+                product=self.product, reviewer=buyer, rating=4
+            )
+            order = Order.objects.create(buyer=buyer, total_price="10.00")
+            OrderItem.objects.create(
+                order=order,
+                product=product,
+                quantity=1,
+                price_at_purchase="10.00",
+            )
+            cart = Cart.objects.create(user=buyer)
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+            StockHold.objects.create(
+                cart=cart,
+                product=product,
+                quantity=1,
+                expires_at=timezone.now() + timedelta(minutes=15),
+            )
+            IdempotencyKey.objects.create(
+                user=buyer, scope="checkout", key="k", fingerprint="f"
+            )
+            create_token(buyer, "token", [])
+            issue_reset_token(buyer)
+
+    def test_product_list(self):
+        response = self.client.get(
+            reverse("product_list", args=[self.store.id])
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_product_detail(self):
+        response = self.client.get(
+            reverse("product_detail", args=[self.product.id])
+        )
+        self.assertContains(response, "buyer9")
+
+    def test_admin_changelists(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "x")
+        )
+        for model in admin.site._registry:
+            meta = model._meta
+            with self.subTest(model=meta.label):
+                response = self.client.get(
+                    reverse(
+                        f"admin:{meta.app_label}_{meta.model_name}_changelist"
+                    )
+                )
+                self.assertEqual(response.status_code, 200)
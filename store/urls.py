@@ -70,6 +70,7 @@ urlpatterns = [
         views.product_detail,
         name="product_detail",
     ),
+    path("search/", views.search, name="search"),
     path(
         'api/vendors/<int:vendor_id>/stores/',
         views.api_get_vendor_stores,
@@ -80,6 +81,11 @@ urlpatterns = [
         views.api_get_store_products,
         name='api_get_store_products',
     ),
+    path(
+        'api/products/',
+        views.api_get_products,
+        name='api_get_products',
+    ),
     path(
         'api/stores/create/',
         views.api_create_store,
@@ -90,9 +96,29 @@ urlpatterns = [
         views.api_add_product,
         name='api_add_product',
     ),
+    path(
+        'api/stores/<int:store_id>/products/import/',
+        views.api_import_products,
+        name='api_import_products',
+    ),
+    path(
+        'api/stores/<int:store_id>/products/export/',
+        views.api_export_store_products,
+        name='api_export_store_products',
+    ),
+    path(
+        'api/vendors/<int:vendor_id>/products/export/',
+        views.api_export_vendor_products,
+        name='api_export_vendor_products',
+    ),
     path(
         'api/products/<int:product_id>/reviews/',
         views.api_get_product_reviews,
         name='api_get_product_reviews',
     ),
+    path(
+        'api/search/',
+        views.api_search,
+        name='api_search',
+    ),
 ]
@@ -1,42 +1,155 @@
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
-from django.core.mail import EmailMessage
+from django.utils.functional import SimpleLazyObject
+from django.views.decorators.http import require_GET
 from django.conf import settings
-from .models import Store, Product, Order, OrderItem, Review
+from django.db import IntegrityError, transaction
+from outbox.mail import queue_email
+from monitoring.metrics import record_checkout
+from accounts.authentication import TokenAuthentication, scope_required
+from accounts.ratelimit import ratelimit
+from .models import Store, Product, OrderItem, Review, StockHold
+from .cart import (
+    add_item,
+    clear as clear_cart,
+    get_cart,
+    get_lines,
+    get_quantities,
+    remove_item,
+)
+from .browse import (
+    SORT_LABELS,
+    SORTS,
+    cache_parts,
+    facet_counts,
+    filter_q,
+    parse_filters,
+)
+from .caching import (
+    get_or_set,
+    get_product_or_404,
+    get_store_or_404,
+    get_version,
+)
+from .checkout import place_order
+from .exports import (
+    CONTENT_TYPES,
+    export_lines,
+    export_queryset,
+    parse_since,
+)
+from .fast_serializers import get_values_serializer
+from .idempotency import idempotent, new_key
+from .imports import ImportFormatError, import_products, read_rows
+from .pagination import (
+    InvalidCursor,
+    KeysetPage,
+    get_page_size,
+    paginate_request,
+)
+from .ratings import record_review
+from .renderers import FAST_RENDERERS, render_json
+from .reservations import release, reserve
+from .search import parse_params, run_search
 from rest_framework.decorators import (
     api_view,
     authentication_classes,
     permission_classes,
+    renderer_classes,
 )
-from rest_framework.authentication import BasicAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from .serializers import StoreSerializer, ProductSerializer, ReviewSerializer
+from .serializers import (
+    StoreSerializer,
+    ProductSerializer,
+    ReviewSerializer,
+    parse_fieldset,
+)
+
+
+# Keyset orderings, each backed by an index (the last field is unique)
+STORE_ORDERING = ["created_at", "id"]
+PRODUCT_ORDERING = ["created_at", "id"]
+REVIEW_ORDERING = ["created_at", "id"]
 
 
 def store_list(request):
-    """Display a list of all stores."""
-    stores = Store.objects.all()
-    return render(request, "store/store_list.html", {"stores": stores})
+    """
+    Display a list of all stores.
+
+    The store list is rendered inside a cached template fragment, so the
+    lazy queryset is only evaluated when the cached copy is stale.
+    """
+    try:
+        stores = paginate_request(request, Store.objects.all(), STORE_ORDERING)
+    except InvalidCursor:
+        raise Http404("Invalid page")
+    return render(
+        request,
+        "store/store_list.html",
+        {
+            "stores": stores,
+            "catalog_version": get_version("stores"),
+            "catalog_timeout": settings.CATALOG_CACHE_TIMEOUT,
+        },
+    )
 
 
 def product_list(request, store_id):
-    """Display all products belonging to a specific store."""
-    store = get_object_or_404(Store, id=store_id)
-    products = Product.objects.filter(store=store)
+    """
+    Display the products of a store, filtered and sorted as requested.
+
+    The product list and the facet counts are rendered inside a cached
+    fragment, so both are only queried when the cached copy is stale.
+    """
+    store = get_store_or_404(store_id)
+    try:
+        filters = parse_filters(request.GET)
+    except ValueError:
+        messages.error(request, "Invalid filters")
+        return redirect("product_list", store_id=store.id)
+
+    store_products = Product.objects.filter(store=store)
+    try:
+        products = paginate_request(
+            request,
+            store_products.filter(filter_q(filters)),
+            SORTS[filters["sort"]],
+        )
+    except InvalidCursor:
+        raise Http404("Invalid page")
     return render(
         request,
         "store/product_list.html",
-        {"store": store, "products": products},
+        {
+            "store": store,
+            "products": products,
+            "filters": filters,
+            "sorts": SORT_LABELS,
+            "facets": SimpleLazyObject(
+                lambda: facet_counts(store_products, filters)
+            ),
+            "catalog_version": get_version(f"store:{store.id}"),
+            "catalog_timeout": settings.CATALOG_CACHE_TIMEOUT,
+        },
     )
 
 
 def product_detail(request, product_id):
-    """Display full details of a single product including reviews."""
-    product = get_object_or_404(Product, id=product_id)
-    reviews = Review.objects.filter(product=product)
+    """
+    Display full details of a single product including reviews.
+
+    The product comes from the catalog cache and the reviews are
+    rendered in a cached fragment. Whether the current user has already
+    reviewed the product is looked up on every request.
+    """
+    product = get_product_or_404(product_id)
+    reviews = Review.objects.filter(product=product).select_related(
+        "reviewer"
+    )
     user_reviewed = (
         request.user.is_authenticated
         and Review.objects.filter(
@@ -51,14 +164,62 @@ def product_detail(request, product_id):
             "product": product,
             "reviews": reviews,
             "user_reviewed": user_reviewed,
+            "catalog_version": get_version(f"product:{product.id}"),
+            "catalog_timeout": settings.CATALOG_CACHE_TIMEOUT,
         },
     )
 
 
+def search_page_url(request, page, absolute=False):
+    """Return the current search URL with ?page= replaced."""
+    params = request.GET.copy()
+    params["page"] = page
+    url = f"{request.path}?{params.urlencode()}"
+    return request.build_absolute_uri(url) if absolute else url
+
+
+def search_products(request, absolute=False):
+    """
+    Run the search described by the request's query parameters.
+
+    Returns (options, page), where page is a KeysetPage of products with
+    `next_url` and `previous_url` pointing at the neighbouring pages.
+    Raises ValueError for malformed parameters.
+    """
+    options = parse_params(request.GET)
+    products, has_next = run_search(options, get_page_size(request))
+
+    page = KeysetPage(products)
+    if has_next and options["page"] < settings.SEARCH_MAX_PAGE:
+        page.next_url = search_page_url(
+            request, options["page"] + 1, absolute
+        )
+    if options["page"] > 1:
+        page.previous_url = search_page_url(
+            request, options["page"] - 1, absolute
+        )
+    return options, page
+
+
+def search(request):
+    """Display products matching a search query, best match first."""
+    try:
+        options, results = search_products(request)
+    except ValueError:
+        messages.error(request, "Invalid search filters")
+        return redirect("search")
+
+    return render(
+        request,
+        "store/search.html",
+        {"options": options, "results": results},
+    )
+
+
 @login_required
 @permission_required('accounts.can_purchase', raise_exception=True)
 def add_to_cart(request, product_id):
-    """Add a product to the session cart with a specified quantity."""
+    """Add a product to the buyer's cart with a specified quantity."""
     product = get_object_or_404(Product, id=product_id)
 
     if not product.is_in_stock():
@@ -67,27 +228,22 @@ def add_to_cart(request, product_id):
 
     quantity = int(request.POST.get("quantity", 1))
 
-    if quantity > product.stock:
-        messages.error(
-            request,
-            f"Only {product.stock} units available.",
-        )
+    if quantity < 1:
+        messages.error(request, "Quantity must be at least 1")
         return redirect("product_detail", product_id=product_id)
 
-    cart = request.session.get("cart", {})
-    product_id_str = str(product_id)
+    cart = get_cart(request, create=True)
 
-    if product_id_str in cart:
-        cart[product_id_str]["quantity"] += quantity
-    else:
-        cart[product_id_str] = {
-            "name": product.name,
-            "price": str(product.price),
-            "quantity": quantity,
-        }
+    with transaction.atomic():
+        if not reserve(cart, product, quantity):
+            product.refresh_from_db(fields=["stock", "reserved"])
+            messages.error(
+                request,
+                f"Only {product.available_stock} units available.",
+            )
+            return redirect("product_detail", product_id=product_id)
 
-    request.session["cart"] = cart
-    request.session.modified = True
+        add_item(cart, product, quantity)
 
     messages.success(request, f"{product.name} added to cart")
     return redirect("product_list", store_id=product.store.id)
@@ -96,158 +252,121 @@ def add_to_cart(request, product_id):
 @login_required
 @permission_required('accounts.can_purchase', raise_exception=True)
 def view_cart(request):
-    """Display the current session cart with subtotals and total."""
-    cart = request.session.get("cart", {})
-    cart_items = []
-    total = 0
-
-    for product_id, item in cart.items():
-        subtotal = float(item["price"]) * item["quantity"]
-        total += subtotal
-        cart_items.append(
-            {
-                "product_id": product_id,
-                "name": item["name"],
-                "price": item["price"],
-                "quantity": item["quantity"],
-                "subtotal": round(subtotal, 2),
-            }
-        )
+    """Display the current cart repriced from the product table."""
+    cart = get_cart(request)
+    cart_items, total = get_lines(cart) if cart else ([], 0)
 
     return render(
         request,
         "store/cart.html",
-        {"cart_items": cart_items, "total": round(total, 2)},
+        {
+            "cart_items": cart_items,
+            "total": total,
+            "idempotency_key": new_key(),
+        },
     )
 
 
 @login_required
 @permission_required('accounts.can_purchase', raise_exception=True)
 def remove_from_cart(request, product_id):
-    """Remove a product from the session cart."""
-    cart = request.session.get("cart", {})
-    product_id_str = str(product_id)
+    """Remove a product from the buyer's cart."""
+    cart = get_cart(request)
+
+    if cart:
+        with transaction.atomic():
+            release(StockHold.objects.filter(cart=cart, product_id=product_id))
+            removed = remove_item(cart, product_id)
 
-    if product_id_str in cart:
-        del cart[product_id_str]
-        request.session["cart"] = cart
-        request.session.modified = True
-        messages.success(request, "Product removed from cart")
+        if removed:
+            messages.success(request, "Product removed from cart")
 
     return redirect("view_cart")
 
 
 @login_required
 @permission_required('accounts.can_purchase', raise_exception=True)
+@idempotent("checkout")
 def checkout(request):
     """
     Handle the checkout process.
 
-    Creates an Order and OrderItems from the session cart,
-    updates product stock, clears the cart, and sends an
-    invoice email to the buyer.
+    Creates an Order and OrderItems from the buyer's cart,
+    updates product stock, clears the cart, and queues an
+    invoice email to the buyer in the same transaction.
+    The cart page posts a one-time idempotency key so a
+    double-submitted form only places one order.
     """
-    cart = request.session.get("cart", {})
+    if request.method != "POST":
+        return redirect("view_cart")
+
+    cart = get_cart(request)
+    quantities = get_quantities(cart) if cart else {}
 
-    if not cart:
+    if not quantities:
         messages.error(request, "Your cart is empty")
         return redirect("view_cart")
 
-    order = Order.objects.create(
-        buyer=request.user,
-        total_price=0,
-    )
+    with transaction.atomic():
+        result = place_order(request.user, quantities, cart=cart)
 
-    for product_id_str, item in cart.items():
-        product = get_object_or_404(Product, id=int(product_id_str))
+        if result.order is not None:
+            queue_invoice_email(request.user, result.order)
+            clear_cart(request, cart)
+    record_checkout(result)
 
-        if not product.is_in_stock():
-            messages.error(
-                request,
-                f"{product.name} is out of stock and was removed",
-            )
-            continue
-
-        if item["quantity"] > product.stock:
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=product.stock,
-                price_at_purchase=product.price,
-            )
-            messages.warning(
-                request,
-                f"Only {product.stock} units of {product.name} "
-                f"were available so your order was adjusted",
-            )
-            product.stock = 0
-            product.save()
-        else:
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=item["quantity"],
-                price_at_purchase=product.price,
-            )
-            product.stock -= item["quantity"]
-            product.save()
-
-    if not OrderItem.objects.filter(order=order).exists():
-        order.delete()
+    for product in result.out_of_stock:
         messages.error(
             request,
-            "All items in your cart are out of stock",
+            f"{product.name} is out of stock and was removed",
         )
-        return redirect("view_cart")
 
-    order.calculate_total()
+    for product in result.adjusted:
+        messages.warning(
+            request,
+            f"Only {product.available} units of {product.name} "
+            f"were available so your order was adjusted",
+        )
 
-    # Mark reviews as verified for products the buyer just purchased
-    for item in OrderItem.objects.filter(order=order):
-        Review.objects.filter(
-            product=item.product,
-            reviewer=request.user,
-        ).update(is_verified=True)
+    if result.missing:
+        messages.error(
+            request,
+            "Some items in your cart are no longer available "
+            "and were removed",
+        )
 
-    del request.session["cart"]
-    request.session.modified = True
+    order = result.order
 
-    try:
-        send_invoice_email(request.user, order)
-    except Exception:
-        messages.warning(
+    if order is None:
+        messages.error(
             request,
-            "Order placed successfully, but invoice email could not be sent",
+            "All items in your cart are out of stock",
         )
+        return redirect("view_cart")
 
     messages.success(request, "Order placed successfully")
     return redirect("store_list")
 
 
-def send_invoice_email(user, order):
-    """Build and send an invoice email to the buyer after checkout."""
-    try:
-        items = OrderItem.objects.filter(order=order)
-        body = f"Thank you for your order #{order.id}\n\n"
-        body += "Items:\n"
-
-        for item in items:
-            body += (
-                f"- {item.product.name} x {item.quantity}"
-                f" @ R{item.price_at_purchase}\n"
-            )
+def queue_invoice_email(user, order):
+    """Build the buyer's invoice and add it to the email outbox."""
+    items = OrderItem.objects.filter(order=order).select_related("product")
+    body = f"Thank you for your order #{order.id}\n\n"
+    body += "Items:\n"
 
-        body += f"\nTotal: R{order.total_price}"
-
-        email = EmailMessage(
-            subject=f"Invoice for Order #{order.id}",
-            body=body,
-            from_email=settings.EMAIL_HOST_USER,
-            to=[user.email],
+    for item in items:
+        body += (
+            f"- {item.product.name} x {item.quantity}"
+            f" @ R{item.price_at_purchase}\n"
         )
-        email.send()
-    except Exception:
-        pass
+
+    body += f"\nTotal: R{order.total_price}"
+
+    queue_email(
+        subject=f"Invoice for Order #{order.id}",
+        body=body,
+        to=[user.email],
+    )
 
 
 @login_required
@@ -271,17 +390,31 @@ def leave_review(request, product_id):
         return redirect("product_detail", product_id=product_id)
 
     if request.method == "POST":
-        rating = request.POST.get("rating")
+        rating = request.POST.get("rating", "")
         comment = request.POST.get("comment")
 
-        review = Review.objects.create(
-            product=product,
-            reviewer=request.user,
-            rating=rating,
-            comment=comment,
-            is_verified=has_purchased,
-        )
-        review.set_verified_status(has_purchased)
+        if rating not in ("1", "2", "3", "4", "5"):
+            messages.error(request, "Please choose a rating from 1 to 5")
+            return render(
+                request,
+                "store/leave_review.html",
+                {"product": product, "has_purchased": has_purchased},
+            )
+
+        try:
+            with transaction.atomic():
+                review = Review.objects.create(
+                    product=product,
+                    reviewer=request.user,
+                    rating=int(rating),
+                    comment=comment,
+                    is_verified=has_purchased,
+                )
+                record_review(review)
+        except IntegrityError:
+            # Another request from the same buyer got there first
+            messages.error(request, "You have already reviewed this product")
+            return redirect("product_detail", product_id=product_id)
 
         messages.success(request, "Review submitted successfully")
         return redirect("product_detail", product_id=product_id)
@@ -310,7 +443,14 @@ def vendor_dashboard(request):
 def vendor_store_detail(request, store_id):
     """Display a single store with its products for the vendor."""
     store = get_object_or_404(Store, id=store_id, owner=request.user)
-    products = Product.objects.filter(store=store)
+    try:
+        products = paginate_request(
+            request,
+            Product.objects.filter(store=store),
+            PRODUCT_ORDERING,
+        )
+    except InvalidCursor:
+        raise Http404("Invalid page")
     return render(
         request,
         "store/vendor_store_detail.html",
@@ -437,7 +577,13 @@ def edit_product(request, product_id):
         product.description = request.POST.get("description")
         product.price = request.POST.get("price")
         product.stock = request.POST.get("stock")
-        product.save()
+        # Only the edited columns: reserved and the rating aggregates may
+        # have changed since the product was read
+        product.save(
+            update_fields=[
+                "name", "description", "price", "stock", "updated_at"
+            ]
+        )
 
         messages.success(request, "Product updated successfully")
         return redirect("vendor_store_detail", store_id=product.store.id)
@@ -465,42 +611,204 @@ def delete_product(request, product_id):
 
 
 # API VIEWS (these return JSON, not HTML pages)
+def page_response_data(page, serializer):
+    """Return the JSON body for one page of values() rows."""
+    return {
+        "next": page.next_url,
+        "previous": page.previous_url,
+        "results": serializer.many(page.items),
+    }
+
+
+def invalid_fieldset_response(exc):
+    """Return the error response for unknown ?fields= or ?expand= names."""
+    return Response(
+        {'error': str(exc)},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def invalid_filter_response(exc):
+    """Return the error response for a malformed filter or sort."""
+    return Response(
+        {'error': f'Invalid {exc}.'},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def invalid_cursor_response():
+    """Return the error response for a cursor that cannot be used."""
+    return Response(
+        {'error': 'Invalid cursor.'},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+@ratelimit("api", api=True)
 @api_view(['GET'])
+@renderer_classes(FAST_RENDERERS)
 def api_get_vendor_stores(request, vendor_id):
     """
     GET /api/vendors/<vendor_id>/stores/
     Anyone can call this — no login needed.
-    Returns all stores belonging to a vendor.
+    Returns the stores belonging to a vendor, one page at a time.
+    Add ?fields=id,name to get only some fields, and ?expand=owner to
+    embed the vendor instead of their id.
     """
-    stores = Store.objects.filter(owner__id=vendor_id)
-    serializer = StoreSerializer(stores, many=True)
-    return Response(serializer.data)
+    try:
+        fields, expand = parse_fieldset(request.GET, StoreSerializer)
+    except ValueError as exc:
+        return invalid_fieldset_response(exc)
+    serializer = get_values_serializer(StoreSerializer, fields, expand)
+
+    try:
+        page = paginate_request(
+            request,
+            serializer.values(
+                Store.objects.filter(owner__id=vendor_id),
+                *STORE_ORDERING,
+            ),
+            STORE_ORDERING,
+            absolute=True,
+        )
+    except InvalidCursor:
+        return invalid_cursor_response()
+
+    data = get_or_set(
+        "api_vendor_stores",
+        [f"vendor:{vendor_id}"],
+        lambda: render_json(page_response_data(page, serializer)),
+        vendor_id,
+        ",".join(fields or ["*"]),
+        ",".join(expand),
+        request.GET.get("cursor", ""),
+        get_page_size(request),
+    )
+    return Response(data)
 
 
+@ratelimit("api", api=True)
 @api_view(['GET'])
+@renderer_classes(FAST_RENDERERS)
 def api_get_store_products(request, store_id):
     """
     GET /api/stores/<store_id>/products/
     Anyone can call this — no login needed.
-    Returns all products in a specific store.
+    Returns the products in a specific store, one page at a time.
+    Filter with ?min_price=, ?max_price=, ?in_stock=1 and ?min_rating=,
+    and sort with ?sort=newest, price, price_desc, popularity or rating.
+    Add ?facets=1 to also get product counts per price range and by
+    stock, ?fields=id,name,price to get only some fields, and
+    ?expand=store to embed the store instead of its id.
     """
-    store = get_object_or_404(Store, id=store_id)
-    products = Product.objects.filter(store=store)
-    serializer = ProductSerializer(products, many=True)
-    return Response(serializer.data)
+    store = get_store_or_404(store_id)
+    try:
+        fields, expand = parse_fieldset(request.GET, ProductSerializer)
+    except ValueError as exc:
+        return invalid_fieldset_response(exc)
+    serializer = get_values_serializer(ProductSerializer, fields, expand)
+
+    try:
+        filters = parse_filters(request.query_params)
+    except ValueError as exc:
+        return invalid_filter_response(exc)
+    ordering = SORTS[filters["sort"]]
+    store_products = Product.objects.filter(store=store)
+    with_facets = request.query_params.get("facets") in ("1", "true")
+
+    try:
+        page = paginate_request(
+            request,
+            serializer.values(
+                store_products.filter(filter_q(filters)),
+                *ordering,
+            ),
+            ordering,
+            absolute=True,
+        )
+    except InvalidCursor:
+        return invalid_cursor_response()
+
+    def compute():
+        data = page_response_data(page, serializer)
+        if with_facets:
+            data["facets"] = facet_counts(store_products, filters)
+        return render_json(data)
+
+    data = get_or_set(
+        "api_store_products",
+        [f"store:{store.id}"],
+        compute,
+        store.id,
+        ",".join(fields or ["*"]),
+        ",".join(expand),
+        *cache_parts(filters),
+        with_facets,
+        request.GET.get("cursor", ""),
+        get_page_size(request),
+    )
+    return Response(data)
+
+
+@ratelimit("api", api=True)
+@api_view(['GET'])
+@renderer_classes(FAST_RENDERERS)
+def api_get_products(request):
+    """
+    GET /api/products/
+    Anyone can call this — no login needed.
+    Returns the products of every store, one page at a time, each with
+    its store embedded. Takes the same filters and ?sort= as the store
+    products endpoint, and ?fields=; pass ?expand= (empty) to get store
+    ids instead of stores.
+    """
+    params = request.GET.copy()
+    params.setdefault("expand", "store")
+    try:
+        fields, expand = parse_fieldset(params, ProductSerializer)
+    except ValueError as exc:
+        return invalid_fieldset_response(exc)
+    serializer = get_values_serializer(ProductSerializer, fields, expand)
+
+    try:
+        filters = parse_filters(request.query_params)
+    except ValueError as exc:
+        return invalid_filter_response(exc)
+    ordering = SORTS[filters["sort"]]
+
+    # Not cached: nearly every write to any product would invalidate
+    # it, and each page is already one index range scan, joined to its
+    # stores by primary key
+    try:
+        page = paginate_request(
+            request,
+            serializer.values(
+                Product.objects.filter(filter_q(filters)),
+                *ordering,
+            ),
+            ordering,
+            absolute=True,
+        )
+    except InvalidCursor:
+        return invalid_cursor_response()
+
+    return Response(page_response_data(page, serializer))
 
 
 @api_view(['POST'])
-@authentication_classes([BasicAuthentication])
-@permission_classes([IsAuthenticated])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, scope_required("stores:write")])
+@idempotent("api_create_store")
 def api_create_store(request):
     """
     POST /api/stores/create/
-    Only logged-in vendors can use this.
+    Only vendors can use this, with an API token that has the
+    stores:write scope (send it as `Authorization: Token <key>`).
     Send JSON like: {"name": "My Shop", "description": "We sell stuff"}
     The owner is set automatically to whoever is logged in.
+    Send an Idempotency-Key header to make retries safe.
     """
-    if not request.user.groups.filter(name='vendor').exists():
+    if request.user.role != 'vendor':
         return Response(
             {'error': 'Only vendors can create stores.'},
             status=status.HTTP_403_FORBIDDEN,
@@ -523,12 +831,15 @@ def api_create_store(request):
 
 
 @api_view(['POST'])
-@authentication_classes([BasicAuthentication])
-@permission_classes([IsAuthenticated])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, scope_required("products:write")])
+@idempotent("api_add_product")
 def api_add_product(request, store_id):
     """
     POST /api/stores/<store_id>/products/add/
-    Only the vendor who OWNS this store can add products.
+    Only the vendor who OWNS this store can add products, with an API
+    token that has the products:write scope.
+    Send an Idempotency-Key header to make retries safe.
     Send JSON like:
     {
         "name": "Cool Shirt",
@@ -537,7 +848,7 @@ def api_add_product(request, store_id):
         "stock": 50
     }
     """
-    if not request.user.groups.filter(name='vendor').exists():
+    if request.user.role != 'vendor':
         return Response(
             {'error': 'Only vendors can add products.'},
             status=status.HTTP_403_FORBIDDEN,
@@ -561,16 +872,194 @@ def api_add_product(request, store_id):
     )
 
 
+def export_response(request, filename, **filters):
+    """
+    Stream the products matching `filters` as NDJSON or CSV.
+
+    The body is generated while it is sent, one chunk of rows at a
+    time, so memory use does not depend on the catalogue size.
+    """
+    format = request.GET.get("format", "ndjson")
+    if format not in CONTENT_TYPES:
+        return JsonResponse(
+            {"error": "format must be ndjson or csv."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    since = request.GET.get("since")
+    if since:
+        try:
+            filters["since"] = parse_since(since)
+        except ValueError:
+            return JsonResponse(
+                {"error": "since must be an ISO 8601 date or datetime."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+    response = StreamingHttpResponse(
+        export_lines(export_queryset(**filters), format),
+        content_type=CONTENT_TYPES[format],
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}.{format}"'
+    )
+    return response
+
+
+@ratelimit("api", api=True)
+@require_GET
+def api_export_store_products(request, store_id):
+    """
+    GET /api/stores/<store_id>/products/export/
+    Anyone can call this — no login needed.
+    Streams every product in the store, oldest change first, as
+    newline-delimited JSON, or as CSV with ?format=csv. Add
+    ?since=<ISO date or datetime> to get only the products changed
+    since then, for example the updated_at of the last row received.
+    """
+    store = get_store_or_404(store_id)
+    return export_response(
+        request,
+        f"store-{store.id}-products",
+        store_id=store.id,
+    )
+
+
+@ratelimit("api", api=True)
+@require_GET
+def api_export_vendor_products(request, vendor_id):
+    """
+    GET /api/vendors/<vendor_id>/products/export/
+    Anyone can call this — no login needed.
+    Streams the products of all the vendor's stores. Takes the same
+    ?format= and ?since= options as the store export.
+    """
+    return export_response(
+        request,
+        f"vendor-{vendor_id}-products",
+        vendor_id=vendor_id,
+    )
+
+
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, scope_required("products:write")])
+def api_import_products(request, store_id):
+    """
+    POST /api/stores/<store_id>/products/import/
+    Only the vendor who OWNS this store can import products, with an
+    API token that has the products:write scope.
+    Send the rows as the request body, either newline-delimited JSON
+    (Content-Type: application/x-ndjson) or CSV with a header line
+    (Content-Type: text/csv), or upload them as the `file` field of a
+    multipart form. Each row needs sku, name, price and stock, and may
+    have a description. Rows whose SKU already exists in the store
+    update that product, the rest are created.
+    Returns counts of created, updated and failed rows, with the errors
+    of the failed rows by line number.
+    """
+    if request.user.role != 'vendor':
+        return Response(
+            {'error': 'Only vendors can import products.'},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    store = get_object_or_404(Store, id=store_id, owner=request.user)
+
+    if request.content_type.startswith('multipart/form-data'):
+        upload = request.FILES.get('file')
+        is_csv = upload is not None and upload.name.endswith('.csv')
+    else:
+        upload = request.stream
+        is_csv = request.content_type.startswith('text/csv')
+
+    if upload is None:
+        return Response(
+            {'error': 'No products were uploaded.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        report = import_products(
+            store,
+            read_rows(upload, 'csv' if is_csv else 'ndjson'),
+        )
+    except ImportFormatError as exc:
+        return Response(
+            {'error': f'Could not read the upload: {exc}'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return Response(report)
+
+
 @api_view(['GET'])
-@authentication_classes([BasicAuthentication])
-@permission_classes([IsAuthenticated])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, scope_required("reviews:read")])
 def api_get_product_reviews(request, product_id):
     """
     GET /api/products/<product_id>/reviews/
-    Only logged-in users can see reviews via API.
-    Returns all reviews for a specific product.
+    Needs an API token with the reviews:read scope.
+    Returns the reviews for a specific product, one page at a time.
+    Add ?fields= to get only some fields, and ?expand=reviewer to embed
+    the reviewer's id and username.
     """
     product = get_object_or_404(Product, id=product_id)
-    reviews = Review.objects.filter(product=product)
-    serializer = ReviewSerializer(reviews, many=True)
-    return Response(serializer.data)
+    try:
+        fields, expand = parse_fieldset(request.GET, ReviewSerializer)
+    except ValueError as exc:
+        return invalid_fieldset_response(exc)
+    serializer = get_values_serializer(ReviewSerializer, fields, expand)
+
+    try:
+        page = paginate_request(
+            request,
+            serializer.values(
+                Review.objects.filter(product=product),
+                *REVIEW_ORDERING,
+            ),
+            REVIEW_ORDERING,
+            absolute=True,
+        )
+    except InvalidCursor:
+        return invalid_cursor_response()
+
+    return Response(page_response_data(page, serializer))
+
+
+@ratelimit("api", api=True)
+@api_view(['GET'])
+def api_search(request):
+    """
+    GET /api/search/?q=<query>
+    Anyone can call this — no login needed.
+    Returns the products matching the query, best match first, one page
+    at a time. Filter with ?in_stock=1, ?min_price= and ?max_price=.
+    Takes ?fields= and ?expand=store like the store products endpoint.
+    """
+    try:
+        fields, expand = parse_fieldset(request.GET, ProductSerializer)
+    except ValueError as exc:
+        return invalid_fieldset_response(exc)
+
+    try:
+        _, page = search_products(request, absolute=True)
+    except ValueError:
+        return Response(
+            {'error': 'Invalid search parameters.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    data = {
+        'next': page.next_url,
+        'previous': page.previous_url,
+        'results': ProductSerializer(
+            page.items,
+            many=True,
+            fields=fields,
+            expand=expand,
+        ).data,
+    }
+    for item, product in zip(data['results'], page.items):
+        item['score'] = round(product.score, 4)
+    return Response(data)